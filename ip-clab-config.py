@@ -3,130 +3,935 @@ import yaml
 import subprocess
 import time
 import os
+import re
+import random
+import asyncio
+import argparse
+import collections
+import json
+import gzip
+import typing
+import hashlib
+import ipaddress
+import io
+import contextlib
+import tempfile
+import itertools
+import cProfile
+import pstats
+import tracemalloc
+import platform
+import ctypes
+import ctypes.util
+import select
+import dataclasses
+import threading
+import sys
+import glob
+import concurrent.futures
+import shutil
+import math
+import heapq
+import statistics
+import gc
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+# Artımlı redeploy durum dosyası sürümü
+STATE_VERSION = 1
+# Input dosyası doğrulama kuralları
+LAB_NAME_RE = re.compile(r'name\s*:\s*([\w.\-]+)$')
+INTERFACE_RE = re.compile(r'[A-Za-z\-]*(\d+(?:/\d+)*)$')
+MAX_REPORTED_ERRORS = 20
+# Tüm lab'ların ortak kullandığı, içeriği lab'dan bağımsız dosyalar
+SHARED_ARTIFACTS = ('ansible.cfg', 'push_config.yaml', 'verify_config.yaml', 'collect_config.yaml',
+                    'save_config.yaml')
+VIOS_CONFIG_DIR = 'config'
+# Containerlab yönetim ağı: node adresleri bu önekten ayrılır (ilk adres ağ geçidi)
+MGMT_NETWORK = 'clab'
+MGMT_SUBNET = '172.20.20.0/24'
+# Snapshot cache: başarılı deploy'larda kaydedilen config'ler, sürüm, dizin ve boyut sınırı
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'clab-cisco-ip-automation', 'snapshots')
+SNAPSHOT_CACHE_SIZE = 256  # MiB
+
+# Batch modu: aynı anda deploy edilen lab'lar ve tüm lab'lar için toplam yapılandırma slotu
+BATCH_WORKERS = 32
+BUDGET_POLL_INTERVAL = 0.05
+
+# Node tipleri (cihaz adı öneki -> tanımlayıcı): containerlab kind/image, yönetim adresi tabanı,
+# Ansible grubu, VIOS mu (ethN arayüzleri, bind edilen startup config), switch mi, loopback havuzları
+# (Loopback0, Loopback10; N numaralı cihaz her havuzun N. /24 bloğunu alır), açılacak switch portları,
+# topoloji sırası ve tahmini kaynak maliyeti (açılış sırasında ve açıldıktan sonra kullanılan çekirdek,
+# bellek MiB)
+BUILTIN_NODE_KINDS = {
+    'r': {'kind': 'cisco_iol', 'image': 'vrnetlab/cisco_iol:17.12.01', 'mgmt_base': 10, 'group': 'cisco_iol',
+          'vios': False, 'switch': False, 'loopbacks': ['1.1.0.0/16', '172.16.0.0/16'], 'switch_ports': [],
+          'order': 0, 'boot_cpu': 0.5, 'idle_cpu': 0.05, 'memory': 512},
+    's': {'kind': 'cisco_iol', 'image': 'vrnetlab/cisco_iol:L2-17.12.01', 'type': 'L2', 'mgmt_base': 100,
+          'group': 'cisco_iol', 'vios': False, 'switch': True, 'loopbacks': ['2.2.0.0/16', '172.17.0.0/16'],
+          'switch_ports': ['Ethernet0/0', 'Ethernet0/1', 'Ethernet0/2', 'Ethernet0/3',
+                           'Ethernet1/0', 'Ethernet1/1', 'Ethernet1/2', 'Ethernet1/3'], 'order': 1,
+          'boot_cpu': 0.5, 'idle_cpu': 0.05, 'memory': 512},
+    'vr': {'kind': 'linux', 'image': 'vrnetlab/cisco_vios:15.9.3M6', 'hostname': 'xrv', 'mgmt_base': 50,
+           'group': 'cisco_vios', 'vios': True, 'switch': False, 'loopbacks': ['3.3.0.0/16', '172.18.0.0/16'],
+           'switch_ports': [], 'order': 2, 'boot_cpu': 1.0, 'idle_cpu': 0.25, 'memory': 1024},
+    # VIOS L2 imajında sadece iki veri arayüzü var, daha büyük port numaraları eth1'e düşürülür
+    'vs': {'kind': 'linux', 'image': 'vrnetlab/cisco_viosl2:15.2.2020', 'type': 'L2', 'hostname': 'viosl2-',
+           'mgmt_base': 150, 'group': 'cisco_vios', 'vios': True, 'switch': True,
+           'loopbacks': ['4.4.0.0/16', '172.19.0.0/16'], 'switch_ports': ['GigabitEthernet0/0', 'GigabitEthernet0/1'],
+           'max_port': 1, 'order': 2,
+           'boot_cpu': 1.0, 'idle_cpu': 0.25, 'memory': 1024},
+}
+NODE_KIND_FIELDS = ('kind', 'image', 'mgmt_base', 'group', 'vios', 'switch', 'loopbacks', 'switch_ports', 'order',
+                    'boot_cpu', 'idle_cpu', 'memory')
+# Açılış dalgaları için host limitleri: çekirdeklerin ve kullanılabilir belleğin en fazla bu oranı
+ADMISSION_CPU_LIMIT = 0.9
+ADMISSION_MEMORY_LIMIT = 0.9
+# Açılmış node'ların ve host'un yükü dalgaları çekirdeklerin bu oranının altına küçültmez,
+# yoksa açılış tek tek sıraya dizilir
+ADMISSION_MIN_WAVE = 0.5
+# Dalgalar (healthy beklemeli) sadece deploy simülasyonu daha az başarısız cihaz ya da daha kısa süre
+# öngörürse uygulanır; her karar için simüle edilen deploy sayısı
+ADMISSION_SIM_RUNS = 5
+# libyaml varsa C loader/dumper kullan
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Cihaz hazırlık kontrolü için imaj bazlı zaman profilleri (saniye)
+READINESS_PROFILES = {
+    'cisco_iol': {'deadline': 300, 'backoff_base': 1, 'backoff_max': 10},
+    'cisco_vios': {'deadline': 900, 'backoff_base': 5, 'backoff_max': 30},
+}
+PROBE_TIMEOUT = 10
+PROMPT_CHECK_CONCURRENCY = 8
+IOS_PROMPT_RE = re.compile(rb'[\w.\-()]+[>#]\s*$')
+# Cihaz bazlı yapılandırma hattı: aşamalar ve eşzamanlılık sınırları
+PIPELINE_STAGES = ['config']
+# Day-0 modunda cihaz yapılandırılmış açılır, sadece doğrulanır (eksikse push'a düşülür)
+DAY0_STAGES = ['verify']
+STAGE_CONCURRENCY = {'config': 16, 'verify': 16}
+VERIFY_FAILED_MSG = 'rendered configuration missing'
+PIPELINE_WORKERS = 16
+# Başarısız aşamalar sadece hatalı cihazda yeniden denenir; hata sınıfı -> deneme sayısı ve backoff (saniye)
+RETRY_POLICIES = {
+    'auth': {'attempts': 1, 'backoff_base': 0, 'backoff_max': 0},
+    'rejected': {'attempts': 1, 'backoff_base': 0, 'backoff_max': 0},
+    'prompt': {'attempts': 3, 'backoff_base': 1, 'backoff_max': 10},
+    'timeout': {'attempts': 4, 'backoff_base': 2, 'backoff_max': 30},
+    'error': {'attempts': 2, 'backoff_base': 2, 'backoff_max': 10},
+}
+# Ansible hata mesajlarından hata sınıfını çıkarmak için (sırayla denenir); auth sadece reddedilen kimlik
+# bilgisidir, paramiko'nun "Authentication timeout." mesajı açılmakta olan cihazdan gelir ve timeout sayılır
+ANSIBLE_ERROR_CLASSES = [
+    ('auth', re.compile(r'(?i)authentication (failed|error)|bad authentication type|no authentication methods|'
+                        r'permission denied|login invalid|invalid credentials')),
+    ('rejected', re.compile(r'% (Invalid input|Incomplete command|Ambiguous command|Unknown command)')),
+    ('prompt', re.compile(r'(?i)prompt|enable mode|privilege')),
+    ('timeout', re.compile(r'(?i)timed? ?out|unreachable|connection (refused|reset|closed)|no route|'
+                           r'socket|broken pipe')),
+]
+# Varsayılan adres havuzları
+P2P_SUPERNET = '10.0.0.0/8'
+P2P_PREFIX = 30
+LAN_SUPERNET = '192.168.0.0/16'
+LAN_PREFIX = 28
+# Cihaz CLI oturumu ayarları
+DEVICE_USERNAME = 'admin'
+DEVICE_PASSWORD = 'admin'
+COMMAND_TIMEOUT = 60
+TRANSPORTS = ('ansible', 'native')
+USERNAME_RE = re.compile(rb'(?i)username:\s*$')
+PASSWORD_RE = re.compile(rb'(?i)password:\s*$')
+LOGIN_FAILED_RE = re.compile(rb'% (Login invalid|Authentication failed)')
+SAVE_PROMPT_RE = re.compile(rb'(Destination filename \[startup-config\]\?|\[confirm\])\s*$')
+# Running ve startup config karşılaştırılırken yok sayılan, içerikle ilgisiz satırlar
+SAVE_IGNORED_LINES = (r'(?m)^(Building configuration|Current configuration|Using \d+ out of|'
+                      r'! Last configuration change|! NVRAM config last updated|ntp clock-period).*$\n?')
+CLI_ERROR_RE = re.compile(r'% (Invalid input|Incomplete command|Ambiguous command|Unknown command)')
+# Ansible çıktısını olay akışı olarak okumak için ayarlar
+ANSIBLE_EVENT_ENV = {
+    'ANSIBLE_STDOUT_CALLBACK': 'ansible.posix.jsonl',
+    'ANSIBLE_DISPLAY_SKIPPED_HOSTS': 'false',
+}
+ANSIBLE_EVENT_STATUS = {
+    'v2_runner_on_ok': 'ok',
+    'v2_runner_on_failed': 'failed',
+    'v2_runner_on_unreachable': 'unreachable',
+    'v2_runner_on_skipped': 'skipped',
+}
+ANSIBLE_EVENT_LINE_LIMIT = 16 * 1024 * 1024
+ANSIBLE_TAIL_LINES = 20
+# ansible.cfg profili: fork'lar çoğunlukla ağ I/O'su bekler, bu yüzden çekirdek başına birden fazla
+ANSIBLE_MIN_FORKS = 5
+ANSIBLE_MAX_FORKS = 200
+ANSIBLE_FORKS_PER_CPU = 4
+ANSIBLE_TIMEOUTS = {'cisco_iol': 30, 'cisco_vios': 60}
+VIOS_SSH_KEX_ALGS = [
+    'ecdh-sha2-nistp256', 'diffie-hellman-group14-sha256',
+    'diffie-hellman-group14-sha1', 'diffie-hellman-group-exchange-sha1',
+    'diffie-hellman-group1-sha1',
+]
+# Planlama benchmark'ı: sentetik topolojiler ve ölçülen aşamalar
+BENCH_VERSION = 2
+BENCH_TOPOLOGIES = ('ring', 'full-mesh', 'hub-spoke', 'leaf-spine', 'fat-tree')
+BENCH_SIZES = (10, 100, 1000, 10000)
+BENCH_STAGES = ('parse', 'yaml', 'network_vars', 'write')
+# Dosya yazma süresi diske bağlı, raporlanır ama regresyon kontrolüne girmez
+BENCH_IO_STAGES = ('write',)
+# Büyük topolojilerde switch LAN havuzu tükenmesin diye benchmark kendi havuzlarını kullanır
+BENCH_POOLS = ('10.0.0.0/8', 30, '100.64.0.0/10', 28)
+BENCH_MGMT_SUBNET = '198.18.0.0/15'
+# Sentetik topolojilerde binlerce cihaz numarası olur, loopback havuzları da büyütülür
+BENCH_LOOPBACKS = {'r': ['20.0.0.0/8', '30.0.0.0/8'], 's': ['21.0.0.0/8', '31.0.0.0/8'],
+                   'vr': ['22.0.0.0/8', '32.0.0.0/8'], 'vs': ['23.0.0.0/8', '33.0.0.0/8']}
+BENCH_THRESHOLD = 1.25
+BENCH_REPEAT = 9
+# Bu farkların altı ölçüm gürültüsü sayılır; süre için taban değer, tekrarların yayılımıyla büyür
+BENCH_NOISE_SECONDS = 0.001
+BENCH_NOISE_SPREAD = 4
+# Her aşamadan hemen önce ölçülen sabit referans iş; paylaşılan/yavaşlayan makinede süreler buna oranlanır
+BENCH_REFERENCE_ITEMS = 20000
+BENCH_NOISE_BYTES = 256 * 1024
+BENCH_PROFILE_LINES = 12
+# Containerlab inventory dosyası bekleme ayarları (inotify yoksa yoklama aralığı)
+INVENTORY_TIMEOUT = 30
+INVENTORY_POLL_INTERVAL = 0.2
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+# Deploy simülasyonu: grup (ya da image) bazlı süre dağılımları, saniye
+# boot: [medyan, lognormal sigma]; command: config satırı başına; session: CLI oturumu açma; save: NVRAM yazma
+SIM_LATENCIES = {
+    'cisco_iol': {'boot': [45, 0.2], 'command': 0.05, 'session': 1.0, 'save': 2.0},
+    'cisco_vios': {'boot': [300, 0.25], 'command': 0.2, 'session': 3.0, 'save': 8.0},
+}
+SIM_CREATE_TIME = 2.0
+SIM_INVENTORY_TIME = 0.5
+SIM_PROBE_FAIL_TIME = 0.1
+# ansible-playbook sürecinin her çalıştırmadaki başlama maliyeti
+SIM_TRANSPORT_OVERHEAD = {'ansible': 3.0, 'native': 0.0}
+SIM_WORKERS = (4, 8, 16, 32)
+SIM_RUNS = 20
+SIM_SEED = 1
+
+class TopologyLink(typing.NamedTuple):
+    """Input dosyasındaki tek bir bağlantı satırı"""
+    line: int
+    device1: str
+    interface1: str
+    device2: str
+    interface2: str
+
+class TopologyError(ValueError):
+    """Input dosyasındaki hatalı satırlar (dosya:satır biçiminde)"""
+    def __init__(self, filename, errors, count):
+        self.filename = filename
+        self.errors = errors
+        self.count = count
+        lines = [f"{filename}:{line}: {message}" for line, message in errors]
+        if count > len(errors):
+            lines.append(f"... and {count - len(errors)} more errors")
+        super().__init__('\n'.join(lines))
+
+def open_input_file(filename):
+    # gzip dosyalarını magic byte'lardan tanı
+    with open(filename, 'rb') as file:
+        magic = file.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(filename, 'rt', encoding='utf-8')
+    return open(filename, 'r', encoding='utf-8')
+
+def parse_link_line(number, fields):
+    # Tek bağlantı satırını doğrula, (TopologyLink, hata mesajı) döndür
+    if len(fields) != 4:
+        return None, (f"expected 4 fields (device interface device interface), "
+                      f"got {len(fields)}: {' '.join(fields)!r}")
+    endpoints = []
+    for device, interface in ((fields[0], fields[1]), (fields[2], fields[3])):
+        kind = NODE_KINDS.of(device)
+        if kind is None:
+            return None, f"unknown device name {device!r} (expected {NODE_KINDS.describe()})"
+        match = INTERFACE_RE.match(interface)
+        if not match:
+            return None, f"invalid interface {interface!r} on {device}"
+        port = match.group(1)
+        device_number = NODE_KINDS.parse(device)[1]
+        if device_number > kind['max_number']:
+            return None, (f"device number {device_number} of {device} does not fit its loopback pools "
+                          f"(at most {kind['max_number']})")
+        if kind['vios'] and not re.fullmatch(r'(0/)?\d+', port):
+            return None, f"invalid VIOS interface {interface!r} on {device} (expected e0/<N>)"
+        endpoints += [device, port]
+    if endpoints[0] == endpoints[2]:
+        return None, f"link from {endpoints[0]} to itself"
+    return TopologyLink(number, *endpoints), None
+
+def iter_input_file(filename):
+    """Input dosyasını (düz veya gzip) satır satır okur: önce lab adını, sonra TopologyLink kayıtlarını üretir"""
+    errors = []
+    count = 0
+    lab_name = None
+    with open_input_file(filename) as file:
+        for number, line in enumerate(file, 1):
+            # Yorumları ve boş satırları atla
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if lab_name is None:
+                # Lab ismini al
+                match = LAB_NAME_RE.match(' '.join(fields))
+                if not match:
+                    raise TopologyError(filename, [(number, "first line must be 'name: <lab_name>'")], 1)
+                lab_name = match.group(1)
+                yield lab_name
+                continue
+            link, error = parse_link_line(number, fields)
+            if error is None:
+                yield link
+                continue
+            # Hatalı satırları atma, biriktir ve sonda raporla (bellek sınırlı)
+            count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append((number, error))
+    if lab_name is None:
+        raise TopologyError(filename, [(0, "missing 'name: <lab_name>' line")], 1)
+    if count:
+        raise TopologyError(filename, errors, count)
 
 def parse_input_file(filename):
-    # Input dosyasını oku
-    with open(filename, 'r') as file:
-        lines = file.readlines()
+    records = iter_input_file(filename)
     # Lab ismini al
-    lab_name = lines[0].split(': ')[1].strip()
+    lab_name = next(records)
     # Bağlantıları parse et
-    connections = []
-    for line in lines[1:]:
-        parts = line.strip().split()
-        if len(parts) == 4:
-            connections.append({
-                'device1': parts[0],
-                'interface1': parts[1][1:],
-                'device2': parts[2],
-                'interface2': parts[3][1:]
-            })
+    connections = list(records)
     return lab_name, connections
 
-def create_yaml_structure(lab_name, connections):
-    # Tüm benzersiz cihazları bul
-    devices = set()
+class NodeKindRegistry:
+    """Cihaz adı öneki -> node tipi tanımlayıcısı; adlar bir kez çözülüp önbellekte tutulur"""
+    def __init__(self, kinds):
+        self.kinds = {}
+        # Cihaz adı -> (önek, numara); her ad topoloji boyunca bir kez parse edilir
+        self.names = {}
+        for prefix, descriptor in kinds.items():
+            self.register(prefix, **descriptor)
+
+    def register(self, prefix, base=None, **fields):
+        """Yeni bir node tipi ekler; base verilirse eksik alanlar o tipten alınır"""
+        if not re.fullmatch(r'[a-z]+', prefix):
+            raise ValueError(f"node kind prefix {prefix!r} must be lowercase letters")
+        if base is not None and base not in self.kinds:
+            raise ValueError(f"node kind {prefix}: unknown base kind {base!r}")
+        descriptor = dict(self.kinds[base] if base is not None else {}, **fields)
+        missing = [field for field in NODE_KIND_FIELDS if field not in descriptor]
+        if missing:
+            raise ValueError(f"node kind {prefix}: missing {', '.join(missing)}")
+        if descriptor['group'] not in READINESS_PROFILES:
+            raise ValueError(f"node kind {prefix}: unknown group {descriptor['group']!r} "
+                             f"(expected {' or '.join(READINESS_PROFILES)})")
+        if descriptor['vios'] and 'hostname' not in descriptor:
+            raise ValueError(f"node kind {prefix}: VIOS kinds need a hostname prefix")
+        pools = [ipaddress.ip_network(pool) for pool in descriptor['loopbacks']]
+        if len(pools) != 2 or any(pool.version != 4 or pool.prefixlen > 24 for pool in pools):
+            raise ValueError(f"node kind {prefix}: loopbacks must be two IPv4 prefixes of /24 or shorter")
+        descriptor['loopback_pools'] = pools
+        # Her cihaz numarası havuzlarda bir /24 bloğu kullanır
+        descriptor['max_number'] = min(pool.num_addresses // 256 for pool in pools) - 1
+        self.kinds[prefix] = descriptor
+        # Uzun önekler önce denenir (vr1 'v' + 'r1' olarak değil 'vr' + '1' olarak çözülür)
+        prefixes = sorted(self.kinds, key=len, reverse=True)
+        self.pattern = re.compile(f"({'|'.join(prefixes)})(\\d+)$")
+        self.names.clear()
+        return descriptor
+
+    def __getitem__(self, prefix):
+        return self.kinds[prefix]
+
+    def parse(self, name):
+        # (önek, numara) ya da bilinmeyen adlar için None
+        parsed = self.names.get(name)
+        if parsed is None:
+            match = self.pattern.fullmatch(name)
+            if match is None:
+                return None
+            parsed = self.names[name] = (match.group(1), int(match.group(2)))
+        return parsed
+
+    def of(self, name):
+        # Cihaz adının tanımlayıcısı, bilinmeyen adlar için None
+        parsed = self.parse(name)
+        return self.kinds[parsed[0]] if parsed else None
+
+    def describe(self):
+        names = [f"{prefix}<N>" for prefix in self.kinds]
+        return ', '.join(names[:-1]) + f" or {names[-1]}" if len(names) > 1 else names[0]
+
+NODE_KINDS = NodeKindRegistry(BUILTIN_NODE_KINDS)
+
+def load_node_kinds(path):
+    # YAML: {<önek>: {base: <mevcut önek>, image: .., mgmt_base: .., loopbacks: [<önek>, <önek>], ...}}
+    with open(path, 'r') as file:
+        kinds = load_yaml(file) or {}
+    if not isinstance(kinds, dict):
+        raise ValueError(f"{path}: expected a mapping of name prefixes to node kinds")
+    for prefix, fields in kinds.items():
+        if not isinstance(fields, dict):
+            raise ValueError(f"{path}: node kind {prefix} must be a mapping")
+        NODE_KINDS.register(str(prefix), **fields)
+    return list(kinds)
+
+@dataclasses.dataclass
+class Node:
+    """Topolojideki tek cihaz; tip, numara ve tanımlayıcı adından bir kez çıkarılır"""
+    __slots__ = ('name', 'type', 'number', 'kind', 'mgmt_ipv4')
+    name: str
+    type: str
+    number: int
+    kind: dict
+    # MgmtPlanner tarafından atanır
+    mgmt_ipv4: typing.Optional[str]
+
+    @classmethod
+    def from_name(cls, name):
+        dtype, number = NODE_KINDS.parse(name)
+        return cls(name, dtype, number, NODE_KINDS[dtype], None)
+
+    @property
+    def vios(self):
+        return self.kind['vios']
+
+    @property
+    def switch(self):
+        return self.kind['switch']
+
+    @property
+    def group(self):
+        return self.kind['group']
+
+    def startup_config(self, config_dir=VIOS_CONFIG_DIR):
+        # VIOS için bind edilen dosya; IOL'de containerlab'ın varsayılan config'ine eklenen partial dosya
+        if self.vios:
+            return f'{config_dir}/{self.name}.cfg'
+        return f'{config_dir}/{self.name}.partial.cfg'
+
+    def clab_node(self, config_dir=VIOS_CONFIG_DIR, day0=False):
+        # Containerlab topology.nodes girdisi
+        descriptor = self.kind
+        node = {'kind': descriptor['kind'], 'image': descriptor['image']}
+        if 'type' in descriptor:
+            node['type'] = descriptor['type']
+        if self.vios:
+            node['binds'] = [f'{self.startup_config(config_dir)}:/config/startup-config.cfg']
+            node['env'] = {'HOSTNAME': f"{descriptor['hostname']}{self.number}"}
+        elif day0:
+            node['startup-config'] = self.startup_config(config_dir)
+        node['mgmt-ipv4'] = self.mgmt_ipv4
+        return node
+
+    def clab_interface(self, port):
+        # IOL için EthernetX/Y, VIOS için ethN
+        if not self.vios:
+            return f"Ethernet{port}"
+        number = port.replace('0/', '')
+        # Sınırlı sayıda interface'i olan imajlarda büyük port numaraları son interface'e düşürülür
+        if 'max_port' in self.kind and int(number) > self.kind['max_port']:
+            number = str(self.kind['max_port'])
+        return f"eth{number}"
+
+@dataclasses.dataclass
+class Interface:
+    """Bir bağlantının cihaz tarafı: arayüz adı, input'taki port ve IP (switch tarafında None)"""
+    __slots__ = ('device', 'name', 'port', 'ip')
+    device: str
+    name: str
+    port: str
+    ip: typing.Optional[str]
+
+@dataclasses.dataclass
+class Link:
+    """Adres ayrılmış bir bağlantı: 'p2p' (router-router) veya 'lan' (router-switch)"""
+    __slots__ = ('id', 'kind', 'subnet', 'ends', 'line')
+    id: int
+    kind: str
+    subnet: str
+    ends: typing.Tuple[Interface, Interface]
+    line: typing.Optional[int]
+
+@dataclasses.dataclass
+class Topology:
+    """Parse edilmiş input'tan bir kez kurulan model: ada göre indeksli node'lar ve input bağlantıları"""
+    __slots__ = ('name', 'nodes', 'links', 'mgmt')
+    name: str
+    nodes: typing.Dict[str, Node]
+    links: typing.List[TopologyLink]
+    # Containerlab mgmt bloğu (ağ adı ve IPv4 öneki)
+    mgmt: dict
+
+class MgmtPlanner:
+    """Yönetim ağından node adresi ayırır; adres -> node indeksiyle çakışma olmaz, sonuç deterministiktir"""
+    def __init__(self, subnet=MGMT_SUBNET, network=MGMT_NETWORK):
+        self.subnet = ipaddress.ip_network(subnet)
+        if self.subnet.version != 4:
+            raise ValueError(f"management subnet {self.subnet} must be IPv4")
+        if self.subnet.num_addresses < 4:
+            raise ValueError(f"management subnet {self.subnet} has no room for nodes")
+        self.network = network
+        self.base = int(self.subnet.network_address)
+        # Ağ adresi ve ağ geçidi (ilk adres) ile broadcast ayrılamaz
+        self.first = 2
+        self.last = self.subnet.num_addresses - 2
+        # Ofset -> node adı; batch modunda aynı ağı paylaşan tüm lab'lar tek indeksi kullanır
+        self.owners = {}
+        self.next_free = self.first
+
+    def mgmt_block(self):
+        return {'network': self.network, 'ipv4-subnet': str(self.subnet)}
+
+    def take(self, offset, owner):
+        # Boşsa ofseti sahibine ayır
+        if not self.first <= offset <= self.last or offset in self.owners:
+            return False
+        self.owners[offset] = owner
+        return True
+
+    def allocate(self, owner):
+        # İlk boş ofset; işaretçi geri gitmez, toplam tarama O(ağ boyutu)
+        while self.next_free in self.owners:
+            self.next_free += 1
+        if self.next_free > self.last:
+            raise ValueError(f"management subnet {self.subnet} exhausted ({self.last - self.first + 1} node "
+                             f"addresses), use a larger --mgmt-subnet")
+        self.owners[self.next_free] = owner
+        return self.next_free
+
+    def assign(self, lab_name, nodes, pinned=None):
+        """Node'lara adres atar: önce önceki çalıştırmanın adresi, sonra tipin ofseti, sonra ilk boş adres"""
+        pinned = pinned or {}
+        offsets = {}
+        for node in nodes:
+            address = pinned.get(node.name)
+            if address is None:
+                continue
+            address = ipaddress.ip_address(address)
+            if address in self.subnet and self.take(int(address) - self.base, f"{lab_name}/{node.name}"):
+                offsets[node.name] = int(address) - self.base
+        # Tip ofseti (r1 -> .11, vr1 -> .51) küçük lab'larda adresleri tanıdık tutar, doluysa atlanır
+        for node in nodes:
+            if node.name not in offsets:
+                offset = node.kind['mgmt_base'] + node.number
+                if self.take(offset, f"{lab_name}/{node.name}"):
+                    offsets[node.name] = offset
+        for node in nodes:
+            if node.name not in offsets:
+                offsets[node.name] = self.allocate(f"{lab_name}/{node.name}")
+            node.mgmt_ipv4 = str(ipaddress.IPv4Address(self.base + offsets[node.name]))
+
+def read_host_load():
+    """/proc/loadavg ve /proc/meminfo'dan host kapasitesini okur, okunamazsa None döndürür"""
+    try:
+        with open('/proc/loadavg', 'r') as file:
+            load = float(file.read().split()[0])
+        with open('/proc/meminfo', 'r') as file:
+            meminfo = dict(line.split(':', 1) for line in file if ':' in line)
+        memory = int(meminfo['MemAvailable'].split()[0]) // 1024
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+    return {'cpus': host_cpus(), 'load': load, 'memory': memory}
+
+def host_cpus():
+    # Bu sürecin kullanabileceği çekirdek sayısı
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def plan_boot_waves(topology, host, share=1.0):
+    """Node'ları host'un boş CPU'sunu aşmayacak açılış dalgalarına böler, dalga listesi döndürür"""
+    nodes = list(topology.nodes.values())
+    if host is None:
+        return [[node.name for node in nodes]]
+    # Önceki dalgaların açılmış node'ları da CPU kullanmaya devam eder
+    cpu_budget = (host['cpus'] * ADMISSION_CPU_LIMIT - host['load']) * share
+    # Yüklü host'ta (ya da --diff'te lab'ın kendi node'ları yükü artırınca) bütçe sıfırın altına iner;
+    # dalga yine de en az çekirdeklerin ADMISSION_MIN_WAVE oranı ve en pahalı tek node kadar olur
+    floor = max(host['cpus'] * ADMISSION_MIN_WAVE * share, max((node.kind['boot_cpu'] for node in nodes), default=0))
+    # En pahalı (en yavaş açılan) node'lar ilk dalgaya, böylece toplam hazır olma süresi kısalır
+    nodes.sort(key=lambda node: -node.kind['boot_cpu'])
+    waves = [[]]
+    wave_cpu = idle_cpu = 0.0
+    for node in nodes:
+        cost = node.kind
+        limit = max(cpu_budget - idle_cpu, cpu_budget * ADMISSION_MIN_WAVE, floor)
+        if waves[-1] and wave_cpu + cost['boot_cpu'] > limit:
+            idle_cpu += sum(topology.nodes[name].kind['idle_cpu'] for name in waves[-1])
+            waves.append([])
+            wave_cpu = 0.0
+        waves[-1].append(node.name)
+        wave_cpu += cost['boot_cpu']
+    return waves
+
+def apply_boot_waves(yaml_dict, waves):
+    # Her dalga, bir önceki dalganın tüm node'ları healthy olduktan sonra oluşturulur
+    nodes = yaml_dict['topology']['nodes']
+    for previous, wave in zip(waves, waves[1:]):
+        for name in wave:
+            nodes[name]['stages'] = {'create': {'wait-for': [{'node': other, 'stage': 'healthy'}
+                                                             for other in previous]}}
+
+def predict_boot(topology, waves, cpus):
+    """Dalgalarla ve hepsi birden açılışı simüle eder, {dalgalı mı: (başarısız cihaz, süre)} döndürür"""
+    sizes = {name: 0 for name in topology.nodes}
+    outcomes = {}
+    for staggered in (True, False):
+        runs = sorted((simulate_deploy(topology, sizes, {'workers': PIPELINE_WORKERS, 'stagger': staggered,
+                                                         'waves': waves if staggered else None,
+                                                         'transport': 'native', 'day0': False},
+                                       sample_boot_times(topology, SIM_LATENCIES, SIM_SEED + run), SIM_LATENCIES,
+                                       cpus, SIM_SEED + run)
+                       for run in range(ADMISSION_SIM_RUNS)),
+                      key=lambda result: (len(result['failed']), result['makespan']))
+        median = runs[len(runs) // 2]
+        outcomes[staggered] = (len(median['failed']), median['makespan'])
+    return outcomes
+
+def admit_boot(topology, yaml_dict, share=1.0):
+    """Host yüküne göre açılış dalgalarını (kazandırıyorsa) YAML'a ekler, containerlab worker sayısını döndürür"""
+    host = read_host_load()
+    waves = plan_boot_waves(topology, host, share)
+    if host is None:
+        apply_boot_waves(yaml_dict, waves)
+        return None
+    if len(waves) > 1:
+        # Her dalga öncekinin tam açılışını bekler; bu zincir, çekirdekleri paylaşarak hepsini birden
+        # açmaktan yavaş olabilir. Lab'ın bu host'taki payıyla iki planı simüle et
+        cpus = max(host['cpus'] * ADMISSION_MIN_WAVE, host['cpus'] * ADMISSION_CPU_LIMIT - host['load']) * share
+        outcomes = predict_boot(topology, waves, max(1.0, cpus))
+        if outcomes[True] >= outcomes[False]:
+            print(f"Boot waves predicted slower ({outcomes[True][1]:.0f}s vs {outcomes[False][1]:.0f}s, "
+                  f"{outcomes[True][0]} vs {outcomes[False][0]} devices not ready), starting all nodes at once")
+            waves = [list(topology.nodes)]
+    apply_boot_waves(yaml_dict, waves)
+    memory = sum(node.kind['memory'] for node in topology.nodes.values())
+    print(f"Host: {host['cpus']} CPUs, load {host['load']:.1f}, {host['memory']} MiB available; "
+          f"booting {len(topology.nodes)} nodes in {len(waves)} wave(s) of at most {max(map(len, waves))}")
+    if memory > host['memory'] * ADMISSION_MEMORY_LIMIT * share:
+        print(f"Warning: the lab needs about {memory} MiB, more than the "
+              f"{int(host['memory'] * ADMISSION_MEMORY_LIMIT * share)} MiB that can be used on this host")
+    return max(map(len, waves))
+
+def build_topology(lab_name, connections, planner=None, pinned=None):
+    """Topoloji modelini kurar ve yönetim adreslerini ayırır (planner verilmezse varsayılan ağdan)"""
+    nodes = {}
     for conn in connections:
-        devices.add(conn['device1'])
-        devices.add(conn['device2'])
-    
-    # YAML yapısını oluştur
-    yaml_dict = {
-        'name': lab_name,
+        for device in (conn.device1, conn.device2):
+            if device not in nodes:
+                nodes[device] = Node.from_name(device)
+    # Tiplerin sırasına göre (r, s, sonra VIOS), numaraya göre (eşitlikte ada göre, her çalıştırmada aynı)
+    ordered = sorted(nodes.values(), key=lambda node: (node.kind['order'], node.number, node.name))
+    planner = planner or MgmtPlanner()
+    planner.assign(lab_name, ordered, pinned)
+    return Topology(lab_name, {node.name: node for node in ordered}, connections, planner.mgmt_block())
+
+def create_yaml_structure(topology, config_dir=VIOS_CONFIG_DIR, day0=False):
+    # YAML yapısını modelden oluştur
+    nodes = topology.nodes
+    return {
+        'name': topology.name,
+        'mgmt': dict(topology.mgmt),
         'topology': {
-            'nodes': {},
-            'links': []
+            'nodes': {name: node.clab_node(config_dir, day0) for name, node in nodes.items()},
+            'links': [{'endpoints': [f"{conn.device1}:{nodes[conn.device1].clab_interface(conn.interface1)}",
+                                     f"{conn.device2}:{nodes[conn.device2].clab_interface(conn.interface2)}"]}
+                      for conn in topology.links],
         }
     }
-    
-    # Cihazları ekle
-    for device in sorted(devices, key=lambda x: (x[0], int(x[1:]) if x[1:].isdigit() else int(x[2:]))):
-        # Temel cihaz özellikleri
-        device_config = {}
-        
-        # Cihaz tipini belirle
-        if device.startswith('r'):
-            # Normal router
-            device_config['kind'] = 'cisco_iol'
-            device_config['image'] = 'vrnetlab/cisco_iol:17.12.01'
-            device_num = int(device[1:])
-            device_config['mgmt-ipv4'] = f'172.20.20.{10 + device_num}'
-        elif device.startswith('s'):
-            # Normal switch
-            device_config['kind'] = 'cisco_iol'
-            device_config['image'] = 'vrnetlab/cisco_iol:L2-17.12.01'
-            device_config['type'] = 'L2'
-            device_num = int(device[1:])
-            device_config['mgmt-ipv4'] = f'172.20.20.{100 + device_num}'
-        elif device.startswith('vr'):
-            device_config['kind'] = 'linux'
-            device_config['image'] = 'vrnetlab/cisco_vios:15.9.3M6'
-            device_config['binds'] = [f'config/{device}.cfg:/config/startup-config.cfg']
-            device_num = int(device[2:])
-            device_config['env'] = {'HOSTNAME': 'xrv'+ str(device_num)}
-            device_config['mgmt-ipv4'] = f'172.20.20.{50 + device_num}'
-        elif device.startswith('vs'):
-            device_config['kind'] = 'linux'
-            device_config['image'] = 'vrnetlab/cisco_viosl2:15.2.2020'
-            device_config['type'] = 'L2'
-            device_config['binds'] = [f'config/{device}.cfg:/config/startup-config.cfg']
-            device_num = int(device[2:])
-            device_config['env'] = {'HOSTNAME': 'viosl2-'+ str(device_num)}
-            device_config['mgmt-ipv4'] = f'172.20.20.{150 + device_num}'
-        
-        yaml_dict['topology']['nodes'][device] = device_config
-    
-    # Bağlantıları ekle - Düzeltilmiş format
-    for conn in connections:
-        # Cihaz tipine göre interface formatını belirle
-        if conn['device1'].startswith(('r', 's')):  # IOL cihazları için
-            endpoint1 = f"{conn['device1']}:Ethernet{conn['interface1']}"
-        else:  # VIOS cihazları için
-            # VIOS için eth formatını kullan
-            interface_num = conn['interface1'].replace('0/', '')
-            # VIOS switch'leri için sadece 0 ve 1 interface'leri kullan
-            if conn['device1'].startswith('vs') and int(interface_num) > 1:
-                interface_num = '1'  # Sınırlı sayıda interface olduğu için 1'e düşür
-            endpoint1 = f"{conn['device1']}:eth{interface_num}"
-            
-        if conn['device2'].startswith(('r', 's')):  # IOL cihazları için
-            endpoint2 = f"{conn['device2']}:Ethernet{conn['interface2']}"
-        else:  # VIOS cihazları için
-            # VIOS için eth formatını kullan
-            interface_num = conn['interface2'].replace('0/', '')
-            # VIOS switch'leri için sadece 0 ve 1 interface'leri kullan
-            if conn['device2'].startswith('vs') and int(interface_num) > 1:
-                interface_num = '1'  # Sınırlı sayıda interface olduğu için 1'e düşür
-            endpoint2 = f"{conn['device2']}:eth{interface_num}"
-        
-        # Endpoints'i doğrudan liste olarak ekle
-        yaml_dict['topology']['links'].append({
-            'endpoints': [endpoint1, endpoint2]
+
+class Tracer:
+    """Aşama ve cihaz adımlarını Chrome trace-event biçiminde kaydeder, her cihaz ayrı bir iz (tid) olur"""
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.processes = {}
+        self.tracks = {(1, 'main'): 0}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def process(self, name):
+        # Batch modunda her lab kendi sürecinde (pid) görünür, cihaz izleri lab'lar arasında karışmaz
+        with self.lock:
+            self.local.pid = self.processes.setdefault(name, len(self.processes) + 2)
+
+    @property
+    def pid(self):
+        return getattr(self.local, 'pid', 1)
+
+    def track(self, name):
+        key = (self.pid, name)
+        with self.lock:
+            if key not in self.tracks:
+                self.tracks[key] = 0 if name == 'main' else 1 + sum(
+                    1 for pid, track in self.tracks if pid == key[0] and track != 'main')
+            return self.tracks[key]
+
+    def add(self, name, track, start, end, args=None):
+        # Uç noktalar ayrı yuvarlanır ki iç içe span'lerin sınırları tutarlı kalsın
+        start, end = round((start - self.origin) * 1e6), round((end - self.origin) * 1e6)
+        self.events.append({
+            'name': name, 'cat': 'phase' if track == 'main' else 'device', 'ph': 'X',
+            'pid': self.pid, 'tid': self.track(track),
+            'ts': start, 'dur': end - start,
+            'args': args or {},
         })
-    
-    return yaml_dict
+
+    @contextlib.contextmanager
+    def span(self, name, track='main', **args):
+        # Çağıran, dönen sözlüğe sonuç bilgisi ekleyebilir
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, track, start, time.perf_counter(), args)
+
+    def write(self, path):
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': track}}
+                 for (pid, track), tid in self.tracks.items()]
+        names += [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': process}}
+                  for process, pid in self.processes.items()]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': names + self.events, 'displayTimeUnit': 'ms'}, file)
+
+    @staticmethod
+    def outermost(spans):
+        # Başka bir span'in içinde olmayan span'ler, başlangıç sırasıyla
+        result = []
+        for event in sorted(spans, key=lambda e: (e['ts'], -e['dur'])):
+            if result and event['ts'] + event['dur'] <= result[-1]['ts'] + result[-1]['dur']:
+                continue
+            result.append(event)
+        return result
+
+    def critical_path(self):
+        """Ana izdeki aşamaları ve paralel bölümlerde en geç biten cihazın adımlarını döndürür"""
+        events = [e for e in self.events if e['pid'] == self.pid]
+        main = [e for e in events if e['tid'] == 0]
+        path = []
+        def inside(event, parent):
+            return parent['ts'] <= event['ts'] and event['ts'] + event['dur'] <= parent['ts'] + parent['dur']
+        def walk(spans, depth):
+            for event in self.outermost(spans):
+                path.append((depth, event, None))
+                children = [e for e in main if e is not event and inside(e, event)]
+                if children:
+                    walk(children, depth + 1)
+                    continue
+                devices = {}
+                for other in events:
+                    if other['tid'] != 0 and inside(other, event):
+                        devices[other['tid']] = max(devices.get(other['tid'], 0), other['ts'] + other['dur'])
+                if devices:
+                    # Paralel bölümü en son biten cihaz belirler
+                    tid = max(devices, key=devices.get)
+                    steps = self.outermost(e for e in events if e['tid'] == tid and inside(e, event))
+                    path.append((depth + 1, None, (tid, steps)))
+        walk(main, 0)
+        return path
+
+    def print_summary(self):
+        roots = self.outermost(e for e in self.events if e['pid'] == self.pid and e['tid'] == 0)
+        if not roots:
+            return
+        total = roots[-1]['ts'] + roots[-1]['dur'] - roots[0]['ts']
+        names = {tid: track for (pid, track), tid in self.tracks.items() if pid == self.pid}
+        print(f"\nCritical path ({total / 1e6:.1f}s):")
+        for depth, event, device in self.critical_path():
+            indent = '  ' * (depth + 1)
+            if event is not None:
+                share = event['dur'] / total * 100 if total else 100
+                print(f"{indent}{event['name']:<{32 - len(indent)}} {event['dur'] / 1e6:>8.2f}s {share:>5.1f}%")
+            else:
+                tid, steps = device
+                print(f"{indent}slowest device {names[tid]}: " +
+                      ', '.join(f"{step['name']} {step['dur'] / 1e6:.2f}s" for step in steps))
+
+TRACER = Tracer()
+
+def trace_stamp():
+    # Aynı saniyede başlayan çalıştırmalar çakışmasın diye milisaniye ve PID eklenir
+    now = time.time()
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}-{os.getpid()}"
+
+def trace_path(lab_name):
+    # Her çalıştırma kendi trace dosyasını yazar
+    return f"clab-{lab_name}.traces/{trace_stamp()}.json"
+
+ARTIFACT_LOG = threading.local()
+
+def artifact_manifest():
+    # Üretilen dosyaların yol -> sha256 kaydı; batch modunda her lab thread'i kendi kaydını tutar
+    if not hasattr(ARTIFACT_LOG, 'artifacts'):
+        ARTIFACT_LOG.artifacts = {}
+    return ARTIFACT_LOG.artifacts
+
+def write_artifact(path, content):
+    """İçerik diskteki dosyadan farklıysa atomik olarak yazar, yazıldıysa True döndürür"""
+    data = content.encode() if isinstance(content, str) else content
+    artifact_manifest()[path] = hashlib.sha256(data).hexdigest()
+    # Aynı içerik tekrar yazılmaz, dosyanın mtime'ı ve inode'u korunur
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as file:
+                if file.read() == data:
+                    return False
+    except OSError:
+        pass
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Geçici dosyaya yaz ve atomik olarak yer değiştir, okuyucular yarım dosya görmez
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb') as file:
+            file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return True
+
+def manifest_path(lab_name):
+    return f"clab-{lab_name}.manifest.json"
+
+def write_manifest(lab_name):
+    """Bu çalıştırmada üretilen dosyaların içerik özetlerini manifest olarak yazar"""
+    artifacts = artifact_manifest()
+    manifest = dict(sorted(artifacts.items()))
+    changed = write_artifact(manifest_path(lab_name), json.dumps(manifest, indent=1) + '\n')
+    artifacts.pop(manifest_path(lab_name), None)
+    return changed
+
+class TopologyDumper(YAML_DUMPER):
+    """Bağlantı uç noktalarını ["a", "b"] biçiminde yazan dumper"""
+
+def represent_list(dumper, data):
+    # Check if this is an endpoints list
+    if len(data) == 2 and all(isinstance(item, str) for item in data):
+        # This is likely an endpoints list, format it as ["item1", "item2"]
+        return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
+    # Otherwise use default representation
+    return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=False)
+
+TopologyDumper.add_representer(list, represent_list)
+
+def dump_yaml(data, sort_keys=True):
+    return yaml.dump(data, Dumper=TopologyDumper, default_flow_style=False, sort_keys=sort_keys)
+
+def load_yaml(file):
+    return yaml.load(file, Loader=YAML_LOADER)
 
 def write_yaml_file(yaml_dict, output_filename):
-    # Custom representer for lists to format endpoints correctly
-    def represent_list(self, data):
-        # Check if this is an endpoints list
-        if len(data) == 2 and all(isinstance(item, str) for item in data):
-            # This is likely an endpoints list, format it as ["item1", "item2"]
-            return self.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
-        # Otherwise use default representation
-        return self.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=False)
-    
-    # Register the custom representer
-    yaml.add_representer(list, represent_list, Dumper=yaml.Dumper)
-    
-    # YAML dosyasını oluştur
-    with open(output_filename, 'w') as file:
-        yaml.dump(yaml_dict, file, default_flow_style=False, sort_keys=False)
+    # YAML dosyasını bellekte oluştur, sadece değiştiyse yaz
+    return write_artifact(output_filename, dump_yaml(yaml_dict, sort_keys=False))
+
+class InotifyWatcher:
+    """Dizinlerdeki dosya kapanma/oluşturma/taşınma olaylarını ctypes üzerinden inotify ile bekler"""
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watched = set()
+
+    def watch(self, directory):
+        if directory in self.watched or not os.path.isdir(directory):
+            return
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.watched.add(directory)
+
+    def wait(self, timeout):
+        # Herhangi bir olay veya zaman aşımı; olayların içeriği önemli değil, çağıran dosyayı tekrar okur
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """inotify olmayan sistemler için kısa aralıklı yoklama"""
+    def watch(self, directory):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, INVENTORY_POLL_INTERVAL))
+
+    def close(self):
+        pass
+
+def open_file_watcher():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher()
+
+def read_inventory(inventory_path, expected_hosts=()):
+    """Inventory'yi parse eder, (inventory, hata) döndürür; yarım yazılmış dosya hata sayılır"""
+    try:
+        with open(inventory_path, 'r') as file:
+            inventory = load_yaml(file)
+    except FileNotFoundError:
+        return None, 'file does not exist'
+    except (OSError, yaml.YAMLError) as e:
+        return None, f"cannot parse: {e}"
+    if not isinstance(inventory, dict) or not isinstance(inventory.get('all'), dict):
+        return None, "no 'all' group"
+    # Kesilmiş ama geçerli bir YAML önekini ayırt etmek için beklenen host'ları ara
+    hosts = set()
+    for group in (inventory['all'].get('children') or {}).values():
+        hosts.update((group or {}).get('hosts') or {})
+    missing = sorted(set(expected_hosts) - hosts)
+    if missing:
+        return None, f"missing hosts: {', '.join(missing[:5])}" + (' ...' if len(missing) > 5 else '')
+    return inventory, None
 
-def enrich_inventory(inventory_path):
+def wait_for_inventory(inventory_path, expected_hosts=(), timeout=INVENTORY_TIMEOUT):
+    """Inventory dosyası tamamen yazılana kadar dosya olaylarını bekler, parse edilmiş inventory'yi döndürür"""
+    deadline = time.monotonic() + timeout
+    directory = os.path.dirname(inventory_path) or '.'
+    watcher = open_file_watcher()
+    try:
+        # Dizin henüz yoksa üst dizinde oluşturulmasını bekle
+        watcher.watch(os.path.dirname(directory) or '.')
+        while True:
+            watcher.watch(directory)
+            inventory, error = read_inventory(inventory_path, expected_hosts)
+            if inventory is not None:
+                return inventory
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{inventory_path} not ready after {timeout}s ({error})")
+            watcher.wait(remaining)
+    finally:
+        watcher.close()
+
+def enrich_inventory(inventory_path, inventory=None):
     # Mevcut inventory'yi oku
-    with open(inventory_path, 'r') as file:
-        inventory = yaml.safe_load(file)
+    if inventory is None:
+        with open(inventory_path, 'r') as file:
+            inventory = load_yaml(file)
     
     # Cisco IOL vars ekle
     if 'all' not in inventory:
@@ -157,19 +962,22 @@ def enrich_inventory(inventory_path):
     if 'cisco_vios' not in inventory['all']['children']:
         inventory['all']['children']['cisco_vios'] = {'hosts': {}}
     
-    # Linux grubundan VIOS cihazlarını bul ve cisco_vios grubuna taşı
-    if 'linux' in inventory['all']['children'] and 'hosts' in inventory['all']['children']['linux']:
-        linux_hosts = inventory['all']['children']['linux']['hosts'].copy()
-        for hostname, host_vars in linux_hosts.items():
-            if 'vr' in hostname or 'vs' in hostname:
-                # VIOS cihazını cisco_vios grubuna ekle
-                inventory['all']['children']['cisco_vios']['hosts'][hostname] = host_vars
-                # Linux grubundan çıkar
-                del inventory['all']['children']['linux']['hosts'][hostname]
+    # Containerlab host'ları kind'a göre gruplar (VIOS 'linux' grubunda), her cihazı tipinin grubuna taşı
+    for group_name, group in list(inventory['all']['children'].items()):
+        for hostname, host_vars in list((group.get('hosts') or {}).items()):
+            # Inventory adı clab-<lab>-<cihaz>; cihaz adında '-' yoktur
+            kind = NODE_KINDS.of(hostname.rsplit('-', 1)[-1])
+            if kind is None or kind['group'] == group_name:
+                continue
+            target = inventory['all']['children'].setdefault(kind['group'], {})
+            if target.get('hosts') is None:
+                target['hosts'] = {}
+            target['hosts'][hostname] = host_vars
+            del group['hosts'][hostname]
         
-        # Linux grubu boş kaldıysa sil
-        if not inventory['all']['children']['linux']['hosts']:
-            del inventory['all']['children']['linux']
+        # Boş kalan grubu sil
+        if 'hosts' in group and not group['hosts'] and group_name not in READINESS_PROFILES:
+            del inventory['all']['children'][group_name]
     
     # VIOS cihazları için parametreleri ekle
     if 'vars' not in inventory['all']['children']['cisco_vios']:
@@ -193,887 +1001,2753 @@ def enrich_inventory(inventory_path):
     inventory['all']['vars']['ansible_httpapi_use_proxy'] = False
     
     # Güncellenmiş inventory'yi yaz
-    with open(inventory_path, 'w') as file:
-        yaml.dump(inventory, file, default_flow_style=False)
-
-def create_loopback_playbooks():
-    # IOL cihazları için loopback playbook
-    iol_playbook = """---
-- name: Configure Loopback Interfaces on IOL Devices
-  hosts: cisco_iol
+    write_artifact(inventory_path, dump_yaml(inventory))
+
+def create_push_config_playbook():
+    # Her cihaz için oluşturulan yapılandırmayı tek oturumda uygula (kayıt ayrı save aşamasında)
+    push_playbook = """---
+- name: Push Rendered Configuration
+  hosts: cisco_iol:cisco_vios
   gather_facts: false
   connection: network_cli
   tasks:
-    - name: Get device number
-      set_fact:
-        device_number: "{{ inventory_hostname.split('-')[-1][1:] }}"
-        device_type: "{{ inventory_hostname.split('-')[-1][0] }}"
-      no_log: true
-    
-    - name: Configure Router Loopbacks
+    - name: Push configuration block
       ios_command:
-        commands:
-          - configure terminal
-          - interface Loopback0
-          - ip address 1.1.{{ device_number }}.1 255.255.255.255
-          - no shutdown
-          - interface Loopback10
-          - ip address 172.16.{{ device_number }}.1 255.255.255.0
-          - no shutdown
-          - end
-      when: device_type == 'r'
-      register: router_config
+        commands: "{{ ['configure terminal'] + config_lines + ['end'] }}"
+      when: config_lines is defined"""
     
-    - name: Configure Switch Loopbacks
-      ios_command:
-        commands:
-          - configure terminal
-          - interface Loopback0
-          - ip address 2.2.{{ device_number }}.1 255.255.255.255
-          - no shutdown
-          - interface Loopback10
-          - ip address 172.17.{{ device_number }}.1 255.255.255.0
-          - no shutdown
-          - end
-      when: device_type == 's'
-      register: switch_config
-    
-    - name: Display Configuration Summary
-      debug:
-        msg: "{{ inventory_hostname.split('-')[-1] }} Loopback Configuration:
-              \\n- Loopback0: {{ '1.1.' if device_type == 'r' else '2.2.' }}{{ device_number }}.1/32
-              \\n- Loopback10: {{ '172.16.' if device_type == 'r' else '172.17.' }}{{ device_number }}.1/24"
-"""
-    
-    # VIOS cihazları için loopback playbook
-    vios_playbook = """---
-- name: Configure Loopback Interfaces on VIOS Devices
-  hosts: cisco_vios
+    # Push playbook'u kaydet
+    write_artifact('push_config.yaml', push_playbook)
+
+def create_verify_config_playbook():
+    # Day-0 config ile açılan cihazlarda, native backend'deki config_mismatches ile aynı kontrol:
+    # her interface kendi bölümünde oluşturulan adreslere sahip olmalı ve kapalı olmamalı
+    verify_playbook = """---
+- name: Verify Day-0 Configuration
+  hosts: cisco_iol:cisco_vios
   gather_facts: false
   connection: network_cli
   tasks:
-    - name: Get device number
-      set_fact:
-        device_number: "{{ inventory_hostname.split('-')[-1][2:] }}"
-        device_type: "{{ inventory_hostname.split('-')[-1][0:2] }}"
-      no_log: true
-    
-    - name: Configure Router Loopbacks
-      ios_command:
-        commands:
-          - configure terminal
-          - interface Loopback0
-          - ip address 3.3.{{ device_number }}.1 255.255.255.255
-          - no shutdown
-          - interface Loopback10
-          - ip address 172.18.{{ device_number }}.1 255.255.255.0
-          - no shutdown
-          - end
-      when: device_type == 'vr'
-      register: router_config
-    
-    - name: Configure Switch Loopbacks
+    - name: Read running configuration
       ios_command:
-        commands:
-          - configure terminal
-          - interface Loopback0
-          - ip address 4.4.{{ device_number }}.1 255.255.255.255
-          - no shutdown
-          - interface Loopback10
-          - ip address 172.19.{{ device_number }}.1 255.255.255.0
-          - no shutdown
-          - end
-      when: device_type == 'vs'
-      register: switch_config
-    
-    - name: Display Configuration Summary
-      debug:
-        msg: "{{ inventory_hostname.split('-')[-1] }} Loopback Configuration:
-              \\n- Loopback0: {{ '3.3.' if device_type == 'vr' else '4.4.' }}{{ device_number }}.1/32
-              \\n- Loopback10: {{ '172.18.' if device_type == 'vr' else '172.19.' }}{{ device_number }}.1/24"
-"""
-    
-    # Playbook'ları kaydet
-    with open('loopback_iol.yaml', 'w') as file:
-        file.write(iol_playbook)
-    
-    with open('loopback_vios.yaml', 'w') as file:
-        file.write(vios_playbook)
-    
-    # Ana playbook'u oluştur (her iki playbook'u çağıran)
-    main_playbook = """---
-- import_playbook: loopback_iol.yaml
-- import_playbook: loopback_vios.yaml
-"""
-    
-    with open('loopback.yaml', 'w') as file:
-        file.write(main_playbook)
-
-def create_interface_ip_playbooks():
-    # IOL cihazları için interface IP playbook
-    iol_playbook = """---
-- name: Configure Interface IPs and Status on IOL Devices
-  hosts: cisco_iol
+        commands: show running-config
+      register: running
+      when: config_lines is defined
+    - name: Check rendered interfaces
+      assert:
+        that: missing == ''
+        fail_msg: \"""" + VERIFY_FAILED_MSG + """: {{ missing }}"
+        quiet: true
+      vars:
+        missing: >-
+          {%- set sections = {} -%}
+          {%- for name, body in running.stdout[0] | regex_findall('(?m)^interface (\\S+)\\n((?:[ ].*(?:\\n|$))*)') -%}
+          {%- set _ = sections.update({name: body.splitlines() | map('trim') | list}) -%}
+          {%- endfor -%}
+          {%- set result = [] -%}
+          {%- set current = namespace(name=none) -%}
+          {%- for line in config_lines -%}
+          {%- if line.startswith('interface ') -%}
+          {%- set current.name = line.split()[1] -%}
+          {%- if current.name not in sections -%}{%- set _ = result.append(line) -%}{%- endif -%}
+          {%- elif current.name in sections -%}
+          {%- if line.startswith('ip address ') and line not in sections[current.name] -%}
+          {%- set _ = result.append(current.name ~ ' ' ~ line) -%}
+          {%- elif line == 'no shutdown' and 'shutdown' in sections[current.name] -%}
+          {%- set _ = result.append(current.name ~ ' no shutdown') -%}
+          {%- endif -%}
+          {%- endif -%}
+          {%- endfor -%}
+          {{ result | join(', ') }}
+      when: config_lines is defined"""
+    
+    # Verify playbook'u kaydet
+    write_artifact('verify_config.yaml', verify_playbook)
+
+def create_collect_config_playbook():
+    # Kaydedilen config'i oku ve snapshot_dir altına host adıyla yaz
+    collect_playbook = """---
+- name: Collect Saved Configuration
+  hosts: cisco_iol:cisco_vios
   gather_facts: false
   connection: network_cli
   tasks:
-    - name: Get device name
-      set_fact:
-        device_name: "{{ inventory_hostname.split('-')[-1] }}"
-        is_router: "{{ inventory_hostname.split('-')[-1].startswith('r') }}"
-      no_log: true
-    
-    # Switch'ler için tüm interface'leri etkinleştir
-    - name: Enable all interfaces on switches
-      ios_command:
-        commands:
-          - configure terminal
-          - interface {{ item }}
-          - no shutdown
-          - end
-      loop:
-        - Ethernet0/0
-        - Ethernet0/1
-        - Ethernet0/2
-        - Ethernet0/3
-        - Ethernet1/0
-        - Ethernet1/1
-        - Ethernet1/2
-        - Ethernet1/3
-      when: not is_router
-    
-    # Router'lar için interface'leri yapılandır
-    - name: Configure router interfaces
-      ios_command:
-        commands:
-          - configure terminal
-          - interface {{ item.name }}
-          - ip address {{ item.ip | regex_replace('/30', ' 255.255.255.252') | regex_replace('/28', ' 255.255.255.240') }}
-          - no shutdown
-          - end
-      loop: "{{ interfaces }}"
-      when: is_router and interfaces is defined
-    
-    # Yapılandırma sonuçlarını göster
-    - name: Show router interface status
-      ios_command:
-        commands:
-          - show ip interface brief | exclude unassigned
-      register: if_status
-      when: is_router
-    
-    - name: Display interface summary
-      debug:
-        msg: |
-          {{ device_name }} Interface Configuration:
-          {% for line in if_status.stdout_lines[0] %}
-          {{ line }}
-          {% endfor %}
-      when: is_router
-    
-    - name: Show switch interface status
+    - name: Read startup configuration
       ios_command:
-        commands:
-          - show interfaces status | include connected
-      register: if_status
-      when: not is_router
-    
-    - name: Display interface summary
-      debug:
-        msg: |
-          {{ device_name }} Interface Status:
-          {% for line in if_status.stdout_lines[0] %}
-          {{ line }}
-          {% endfor %}
-      when: not is_router
-"""
-    
+        commands: show startup-config
+      register: saved
+    - name: Store configuration
+      copy:
+        content: "{{ saved.stdout[0] }}\\n"
+        dest: "{{ snapshot_dir }}/{{ inventory_hostname }}.cfg"
+      delegate_to: localhost"""
+    
+    # Collect playbook'u kaydet
+    write_artifact('collect_config.yaml', collect_playbook)
 
-    # VIOS cihazları için interface IP playbook - GigabitEthernet formatını kullan
-    vios_playbook = """---
-- name: Configure Interface IPs and Status on VIOS Devices
-  hosts: cisco_vios
+def create_save_config_playbook():
+    # Running config startup config'ten farklıysa kaydet; hatalar yok sayılmaz, host bazında raporlanır
+    save_playbook = f"""---
+- name: Save Changed Configurations
+  hosts: cisco_iol:cisco_vios
   gather_facts: false
   connection: network_cli
   tasks:
-    - name: Get device name
-      set_fact:
-        device_name: "{{ inventory_hostname.split('-')[-1] }}"
-        is_router: "{{ inventory_hostname.split('-')[-1].startswith('vr') }}"
-      no_log: true
-    
-    # Switch'ler için tüm interface'leri etkinleştir
-    - name: Enable all interfaces on switches
+    - name: Read running and startup configuration
       ios_command:
         commands:
-          - configure terminal
-          - interface {{ item }}
-          - no shutdown
-          - end
-      loop:
-        - GigabitEthernet0/0
-        - GigabitEthernet0/1
-      when: not is_router
-    
-    # Router'lar için interface'leri yapılandır
-    - name: Convert interface names for VIOS
+          - show running-config
+          - show startup-config
+      register: configs
+    - name: Compare configuration digests
       set_fact:
-        converted_interfaces: "{{ interfaces | map('combine', {'name': 'GigabitEthernet0/' + item.name.replace('eth', '') }) | list }}"
-      loop: "{{ interfaces }}"
-      when: is_router and interfaces is defined
-      loop_control:
-        label: "{{ item.name }}"
-      register: conversion_result
-    
-    - name: Configure router interfaces
-      ios_command:
-        commands:
-          - configure terminal
-          - interface {{ item.name }}
-          - ip address {{ item.ip | regex_replace('/30', ' 255.255.255.252') | regex_replace('/28', ' 255.255.255.240') }}
-          - no shutdown
-          - end
-      loop: "{{ converted_interfaces }}"
-      when: is_router and converted_interfaces is defined
-    
-    # Yapılandırma sonuçlarını göster
-    - name: Show router interface status
-      ios_command:
-        commands:
-          - show ip interface brief | exclude unassigned
-      register: if_status
-      when: is_router
-    
-    - name: Display interface summary
-      debug:
-        msg: |
-          {{ device_name }} Interface Configuration:
-          {% for line in if_status.stdout_lines[0] %}
-          {{ line }}
-          {% endfor %}
-      when: is_router
-    
-    - name: Show switch interface status
-      ios_command:
-        commands:
-          - show interfaces status | include connected
-      register: if_status
-      when: not is_router
-    
-    - name: Display interface summary
-      debug:
-        msg: |
-          {{ device_name }} Interface Status:
-          {% for line in if_status.stdout_lines[0] %}
-          {{ line }}
-          {% endfor %}
-      when: not is_router
-"""
-    
-    # Playbook'ları kaydet
-    with open('interface_ip_iol.yaml', 'w') as file:
-        file.write(iol_playbook)
-    
-    with open('interface_ip_vios.yaml', 'w') as file:
-        file.write(vios_playbook)
-    
-    # Ana playbook'u oluştur (her iki playbook'u çağıran)
-    main_playbook = """---
-- import_playbook: interface_ip_iol.yaml
-- import_playbook: interface_ip_vios.yaml
-"""
-    
-    with open('interface_ip.yaml', 'w') as file:
-        file.write(main_playbook)
-
-def create_save_config_playbooks():
-    # IOL ve VIOS cihazları için ortak save playbook
-    save_playbook = """---
-- name: Save Running Config to Startup Config
-  hosts: cisco_iol:cisco_vios
-  gather_facts: false
-  connection: network_cli
-  tasks:
+        running_digest: "{{{{ configs.stdout[0] | regex_replace(ignored, '') | trim | hash('sha1') }}}}"
+        startup_digest: "{{{{ configs.stdout[1] | regex_replace(ignored, '') | trim | hash('sha1') }}}}"
+      vars:
+        ignored: '{SAVE_IGNORED_LINES}'
     - name: Save configuration
       cli_command:
         command: copy running-config startup-config
-        prompt: 'Destination filename \[startup-config\]'
-        answer: "\r"
+        prompt: 'Destination filename \\[startup-config\\]'
+        answer: "\\r"
       register: output
-      ignore_errors: yes
-    - name: Display save output
-      debug:
-        var: output.stdout_lines
-      when: output is defined"""
+      when: running_digest != startup_digest
+      changed_when: true
+      failed_when: "'[OK]' not in output.stdout and 'bytes copied' not in output.stdout\""""
     
     # Save playbook'u kaydet
-    with open('save_config.yaml', 'w') as file:
-        file.write(save_playbook)
+    write_artifact('save_config.yaml', save_playbook)
 
-def save_iol_config(lab_name, inventory_path):
-    save_playbook = """---
-- name: Save Running Config to Startup Config for IOL Devices
-  hosts: cisco_iol
-  gather_facts: false
-  connection: network_cli
-  tasks:
-    - name: Save configuration
-      cli_command:
-        command: copy running-config startup-config
-        prompt: 'Destination filename \[startup-config\]'
-        answer: "\r"
-      register: output
-      ignore_errors: yes
-    - name: Display save output
-      debug:
-        var: output.stdout_lines
-      when: output is defined"""
-    
-    # Save playbook'u kaydet
-    with open('save_iol_config.yaml', 'w') as file:
-        file.write(save_playbook)
-    # Save playbook'u çalıştır
-    print("\nSaving configurations...")
-    result = subprocess.run(
-        ['ansible-playbook', '-i', inventory_path, 'save_iol_config.yaml'],
-        capture_output=True, 
-        text=True,
-        env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-    )
-    if result.returncode == 0:
-        print("Configurations successfully saved")
-        # Başarılı kayıt mesajlarını göster
-        for line in result.stdout.split('\n'):
-            if 'bytes copied' in line:
-                print(line.strip())
-    else:
-        print("Error during configuration save:")
-        if result.stderr:
-            print(result.stderr)
+class SubnetPool:
+    """Bir supernet'i sabit boyutlu alt ağlara bölen tamsayı tabanlı havuz"""
+    def __init__(self, supernet, prefixlen):
+        network = ipaddress.ip_network(supernet)
+        if not network.prefixlen <= prefixlen <= network.max_prefixlen:
+            raise ValueError(f"prefix length /{prefixlen} does not fit in {network}")
+        self.supernet = network
+        self.prefixlen = prefixlen
+        self.base = int(network.network_address)
+        self.size = 1 << (network.max_prefixlen - prefixlen)
+        self.capacity = 1 << (prefixlen - network.prefixlen)
+        self.address_class = type(network.network_address)
+        self.next_index = 0
+        # Önceden ayrılmış (sabitlenmiş) indeksler
+        self.reserved = set()
 
-def save_startup_config(lab_name, inventory_path):
-    save_playbook = """---
-- name: Save Running Config to Startup Config
-  hosts: cisco_iol:cisco_vios
-  gather_facts: false
-  connection: network_cli
-  tasks:
-    - name: Save configuration
-      cli_command:
-        command: copy running-config startup-config
-        prompt: 'Destination filename \[startup-config\]'
-        answer: "\r"
-      register: output
-      ignore_errors: yes
-    - name: Display save output
-      debug:
-        var: output.stdout_lines
-      when: output is defined"""
-    
-    # Save playbook'u kaydet
-    with open('save_config.yaml', 'w') as file:
-        file.write(save_playbook)
-    # Save playbook'u çalıştır
-    print("\nSaving configurations...")
-    result = subprocess.run(
-        ['ansible-playbook', '-i', inventory_path, 'save_config.yaml'],
-        capture_output=True, 
-        text=True,
-        env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-    )
-    if result.returncode == 0:
-        print("Configurations successfully saved")
-        # Başarılı kayıt mesajlarını göster
-        for line in result.stdout.split('\n'):
-            if 'bytes copied' in line:
-                print(line.strip())
-    else:
-        print("Error during configuration save:")
-        if result.stderr:
-            print(result.stderr)
-           
-def create_network_vars(connections, lab_name):
-    """Ağ yapılandırması için host_vars oluşturur"""
-    class IPTracker:
-        def __init__(self):
-            self.used_subnets = set()
-            self.switch_subnets = {}
-            
-        def get_ip_pair(self, r1, r2):
-            # Router-Router bağlantıları için /30
-            # Cihaz numaralarını al
-            if r1.startswith('vr'):
-                r1_num = 100 + int(r1[2:])  # vr1 -> 101, vr2 -> 102, ...
-            else:
-                r1_num = int(r1[1:])  # r1 -> 1, r2 -> 2, ...
-                
-            if r2.startswith('vr'):
-                r2_num = 100 + int(r2[2:])  # vr1 -> 101, vr2 -> 102, ...
-            else:
-                r2_num = int(r2[1:])  # r1 -> 1, r2 -> 2, ...
-            
-            subnet = f"10.{r1_num}.{r2_num}.0"
-            if subnet not in self.used_subnets:
-                self.used_subnets.add(subnet)
-                return f"10.{r1_num}.{r2_num}.1/30", f"10.{r1_num}.{r2_num}.2/30"
-            return None, None
-            
-        def get_switch_subnet_ip(self, switch, router):
-            # Switch ID'sini al
-            if switch.startswith('vs'):
-                switch_id = 100 + int(switch[2:])  # vs1 -> 101, vs2 -> 102, ...
-            else:
-                switch_id = int(switch[1:])  # s1 -> 1, s2 -> 2, ...
-            
-            if switch not in self.switch_subnets:
-                # Switch ID'sine göre subnet bloğu oluştur
-                self.switch_subnets[switch] = {
-                    'subnet': f"192.168.{switch_id}.0/28",
-                    'next_host': 1
-                }
-                                              
-            # Bir sonraki kullanılabilir IP'yi al
-            next_ip = self.switch_subnets[switch]['next_host']
-            self.switch_subnets[switch]['next_host'] += 1
-            
-            # 192.168.switch_id.1, 192.168.switch_id.2, ... şeklinde IP'ler ata
-            return f"192.168.{switch_id}.{next_ip}/28"
-    
-    ip_tracker = IPTracker()
-    
-    # Cihaz bazlı yapılandırma bilgilerini tut
-    device_configs = {}
-    
+    def reserve(self, index):
+        if not 0 <= index < self.capacity:
+            raise ValueError(f"subnet index {index} is outside {self.supernet}")
+        self.reserved.add(index)
+
+    def allocate(self):
+        # O(1) amortize: sabitlenmemiş sıradaki indeks
+        while self.next_index in self.reserved:
+            self.next_index += 1
+        if self.next_index >= self.capacity:
+            raise ValueError(f"address pool {self.supernet} exhausted ({self.capacity} /{self.prefixlen} subnets)")
+        index = self.next_index
+        self.next_index += 1
+        return index
+
+    def network(self, index):
+        return f"{self.address_class(self.base + index * self.size)}/{self.prefixlen}"
+
+    def address(self, index, host):
+        return f"{self.address_class(self.base + index * self.size + host)}/{self.prefixlen}"
+
+class IPAllocator:
+    """Router-Router (/30 veya /31) ve switch LAN alt ağları için adres ayırıcı"""
+    def __init__(self, p2p_supernet=P2P_SUPERNET, p2p_prefix=P2P_PREFIX,
+                 lan_supernet=LAN_SUPERNET, lan_prefix=LAN_PREFIX):
+        self.p2p = SubnetPool(p2p_supernet, p2p_prefix)
+        self.lan = SubnetPool(lan_supernet, lan_prefix)
+        if self.p2p.size < 2:
+            raise ValueError(f"point-to-point prefix /{p2p_prefix} has no room for two hosts")
+        if self.lan.size < 4:
+            raise ValueError(f"switch LAN prefix /{lan_prefix} has no room for hosts")
+        # /31 için her iki adres de kullanılır, daha büyük alt ağlarda network/broadcast atlanır
+        self.p2p_first = 0 if self.p2p.size == 2 else 1
+        self.switch_subnets = {}
+        # Bu çalıştırmanın atamaları ve önceki çalıştırmadan sabitlenen atamalar (bağlantı anahtarına göre)
+        self.assignments = {'p2p': {}, 'lan': {}, 'hosts': {}}
+        self.pinned = {'p2p': {}, 'lan': {}, 'hosts': {}}
+
+    def pools(self):
+        return [str(self.p2p.supernet), self.p2p.prefixlen, str(self.lan.supernet), self.lan.prefixlen]
+
+    def pin(self, assignments):
+        """Önceki çalıştırmanın atamalarını korur, böylece artımlı redeploy'da adresler kaymaz"""
+        self.pinned = assignments
+        for index in assignments['p2p'].values():
+            self.p2p.reserve(index)
+        for index in assignments['lan'].values():
+            self.lan.reserve(index)
+
+    def get_ip_pair(self, key=None):
+        # (ip1, ip2, alt ağ) döndürür
+        index = self.pinned['p2p'].get(key)
+        if index is None:
+            index = self.p2p.allocate()
+        if key is not None:
+            self.assignments['p2p'][key] = index
+        return (self.p2p.address(index, self.p2p_first),
+                self.p2p.address(index, self.p2p_first + 1),
+                self.p2p.network(index))
+
+    def get_switch_subnet_ip(self, switch, key=None):
+        pinned_hosts = self.pinned['hosts'].get(switch, {})
+        if switch not in self.switch_subnets:
+            index = self.pinned['lan'].get(switch)
+            if index is None:
+                index = self.lan.allocate()
+            self.assignments['lan'][switch] = index
+            self.switch_subnets[switch] = {'index': index, 'next': 1, 'used': set(pinned_hosts.values())}
+        subnet = self.switch_subnets[switch]
+        host = pinned_hosts.get(key)
+        if host is None:
+            while subnet['next'] in subnet['used']:
+                subnet['next'] += 1
+            host = subnet['next']
+            if host > self.lan.size - 2:
+                raise ValueError(f"{switch} has more than {self.lan.size - 2} attached routers, "
+                                 f"use a shorter switch LAN prefix than /{self.lan.prefixlen}")
+            subnet['used'].add(host)
+        if key is not None:
+            self.assignments['hosts'].setdefault(switch, {})[key] = host
+        return self.lan.address(subnet['index'], host)
+
+    def switch_subnet(self, switch):
+        return self.lan.network(self.switch_subnets[switch]['index'])
+
+def ios_interface_name(name):
+    # VIOS için ethX -> GigabitEthernet0/X
+    if name.startswith('eth'):
+        return 'GigabitEthernet0/' + name[3:]
+    return name
+
+def ip_address_line(ip):
+    address = ipaddress.ip_interface(ip)
+    return f'ip address {address.ip} {address.netmask}'
+
+def render_device_config(node, interfaces):
+    """Cihazın loopback, interface ve port yapılandırmasını tek komut listesi olarak oluşturur"""
+    # N numaralı cihaz havuzun N. /24 bloğunun ilk adresini alır (r3: 1.1.3.1/32, 172.16.3.1/24)
+    loopback0, loopback10 = (pool.network_address + node.number * 256 + 1 for pool in node.kind['loopback_pools'])
+    lines = [
+        'interface Loopback0',
+        f'ip address {loopback0} 255.255.255.255',
+        'no shutdown',
+        'interface Loopback10',
+        f'ip address {loopback10} 255.255.255.0',
+        'no shutdown',
+    ]
+    # Switch'ler için tüm portları etkinleştir
+    for port in node.kind['switch_ports']:
+        lines += [f'interface {port}', 'no shutdown']
+    # Router interface'lerine IP ata
+    for interface in interfaces:
+        lines += [f"interface {ios_interface_name(interface['name'])}",
+                  ip_address_line(interface['ip']), 'no shutdown']
+    return lines
+
+def render_startup_config(node, config_lines):
+    """Cihazın açılışta yükleyeceği tam day-0 config'i: hostname, yönetim kullanıcısı ve yapılandırma"""
+    lines = [f'hostname {node.name}',
+             f'enable secret {DEVICE_PASSWORD}',
+             f'username {DEVICE_USERNAME} privilege 15 secret {DEVICE_PASSWORD}']
+    # Komut listesini IOS config biçimine çevir (interface altındaki satırlar girintili)
+    for line in config_lines:
+        if line.startswith('interface '):
+            lines += ['!', line]
+        else:
+            lines.append(' ' + line)
+    lines += ['!', 'line vty 0 4', ' login local', '!', 'end']
+    return '\n'.join(lines) + '\n'
+
+class LinkTable:
+    """Ayrılmış bağlantıların tek seferde kurulan indeksi: link id, uç nokta ve cihaz bazlı"""
+    def __init__(self):
+        self.links = []
+        self.by_endpoint = {}
+        self.by_device = {}
+
+    def add(self, kind, subnet, end1, end2, line=None):
+        link_id = len(self.links)
+        for end in (end1, end2):
+            other = self.by_endpoint.get((end.device, end.name))
+            if other is not None:
+                raise ValueError(f"line {line}: {end.device} {end.port} is already used "
+                                 f"by the link on line {self.links[other].line}")
+        self.links.append(Link(link_id, kind, subnet, (end1, end2), line))
+        for end in (end1, end2):
+            self.by_endpoint[(end.device, end.name)] = link_id
+            self.by_device.setdefault(end.device, []).append(link_id)
+        return link_id
+
+    def add_device(self, device):
+        self.by_device.setdefault(device, [])
+
+    def peer(self, device, interface):
+        # Bir uç noktanın karşı ucunu O(1) bul
+        end1, end2 = self.links[self.by_endpoint[(device, interface)]].ends
+        return end2 if (end1.device, end1.name) == (device, interface) else end1
+
+    def device_interfaces(self, device):
+        # Cihazın IP atanmış interface'leri, host_vars formatında
+        interfaces = []
+        for link_id in self.by_device[device]:
+            end1, end2 = self.links[link_id].ends
+            local, remote = (end1, end2) if end1.device == device else (end2, end1)
+            if local.ip is not None:
+                interfaces.append({'name': local.name, 'ip': local.ip, 'connected_to': remote.device})
+        return interfaces
+
+def router_endpoint(node, port, ip):
+    # VIOS için eth formatını, IOL için Ethernet formatını kullan
+    if node.vios:
+        port = port.replace('0/', '')
+        return Interface(node.name, f"eth{port}", port, ip)
+    return Interface(node.name, f"Ethernet{port}", port, ip)
+
+def build_link_table(topology, allocator):
+    """Bağlantılara adres ayırır ve LinkTable'ı oluşturur"""
+    links = LinkTable()
+    nodes = topology.nodes
     # Önce switch bağlantılarını işle
-    for conn in connections:
-        if conn['device1'].startswith('s') or conn['device1'].startswith('vs') or conn['device2'].startswith('s') or conn['device2'].startswith('vs'):
-            switch = conn['device1'] if conn['device1'].startswith('s') or conn['device1'].startswith('vs') else conn['device2']
-            router = conn['device2'] if conn['device1'].startswith('s') or conn['device1'].startswith('vs') else conn['device1']
-            
-            # Router'ın r veya vr olduğunu kontrol et
-            if router.startswith('r') or router.startswith('vr'):
-                router_interface = conn['interface2'] if conn['device1'].startswith('s') or conn['device1'].startswith('vs') else conn['interface1']
-                
-                ip = ip_tracker.get_switch_subnet_ip(switch, router)
-                
-                # Router yapılandırmasını ekle
-                if router not in device_configs:
-                    device_configs[router] = {'interfaces': []}
-                
-                # Interface adını belirle
-                if router.startswith('vr'):
-                    # VIOS için eth formatını kullan
-                    interface_num = router_interface.replace('0/', '')
-                    interface_name = f"eth{interface_num}"
-                else:
-                    interface_name = f"Ethernet{router_interface}"
-                
-                device_configs[router]['interfaces'].append({
-                    'name': interface_name,
-                    'ip': ip,
-                    'connected_to': switch
-                })
-    
-    # Router-Router bağlantılarını işle
-    for conn in connections:
-        if (conn['device1'].startswith('r') or conn['device1'].startswith('vr')) and (conn['device2'].startswith('r') or conn['device2'].startswith('vr')):
-            ip1, ip2 = ip_tracker.get_ip_pair(conn['device1'], conn['device2'])
-            
-            if ip1 and ip2:
-                # İlk router yapılandırmasını ekle
-                if conn['device1'] not in device_configs:
-                    device_configs[conn['device1']] = {'interfaces': []}
-                
-                # Interface adını belirle
-                if conn['device1'].startswith('vr'):
-                    # VIOS için eth formatını kullan
-                    interface_num = conn['interface1'].replace('0/', '')
-                    interface_name1 = f"eth{interface_num}"
-                else:
-                    interface_name1 = f"Ethernet{conn['interface1']}"
-                
-                device_configs[conn['device1']]['interfaces'].append({
-                    'name': interface_name1,
-                    'ip': ip1,
-                    'connected_to': conn['device2']
-                })
-                
-                # İkinci router yapılandırmasını ekle
-                if conn['device2'] not in device_configs:
-                    device_configs[conn['device2']] = {'interfaces': []}
-                
-                # Interface adını belirle
-                if conn['device2'].startswith('vr'):
-                    # VIOS için eth formatını kullan
-                    interface_num = conn['interface2'].replace('0/', '')
-                    interface_name2 = f"eth{interface_num}"
-                else:
-                    interface_name2 = f"Ethernet{conn['interface2']}"
-                
-                device_configs[conn['device2']]['interfaces'].append({
-                    'name': interface_name2,
-                    'ip': ip2,
-                    'connected_to': conn['device1']
-                })
-    
-    # Switch'ler için boş yapılandırma ekle (sadece interface'leri aktif etmek için)
-    for conn in connections:
-        for device in [conn['device1'], conn['device2']]:
-            if (device.startswith('s') or device.startswith('vs')) and device not in device_configs:
-                device_configs[device] = {'interfaces': []}
-    
-    # Host vars dizinini oluştur
-    host_vars_dir = f"clab-{lab_name}/host_vars"
-    os.makedirs(host_vars_dir, exist_ok=True)
-    
-    # Her cihaz için host_vars dosyası oluştur
-    for device, config in device_configs.items():
-        with open(f"{host_vars_dir}/clab-{lab_name}-{device}.yml", 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
-    
-    # Yapılandırma özetini göster
+    for conn in topology.links:
+        for device in (conn.device1, conn.device2):
+            links.add_device(device)
+        node1, node2 = nodes[conn.device1], nodes[conn.device2]
+        if node1.switch and not node2.switch:
+            switch, switch_port, router, router_port = node1, conn.interface1, node2, conn.interface2
+        elif node2.switch and not node1.switch:
+            switch, switch_port, router, router_port = node2, conn.interface2, node1, conn.interface1
+        else:
+            continue
+        ip = allocator.get_switch_subnet_ip(switch.name, f"{router.name}:{router_port}|{switch.name}:{switch_port}")
+        links.add('lan', allocator.switch_subnet(switch.name),
+                  router_endpoint(router, router_port, ip),
+                  Interface(switch.name, switch_port, switch_port, None),
+                  conn.line)
+    # Router-Router bağlantılarını işle - paralel bağlantılar dahil her bağlantı kendi alt ağını alır
+    for conn in topology.links:
+        node1, node2 = nodes[conn.device1], nodes[conn.device2]
+        if not node1.switch and not node2.switch:
+            ip1, ip2, subnet = allocator.get_ip_pair(
+                f"{conn.device1}:{conn.interface1}|{conn.device2}:{conn.interface2}")
+            links.add('p2p', subnet,
+                      router_endpoint(node1, conn.interface1, ip1),
+                      router_endpoint(node2, conn.interface2, ip2),
+                      conn.line)
+    return links
+
+def print_link_summary(links):
+    # Yapılandırma özetini göster - tablo üzerinden tek geçiş
     print("\nInterface IPs to be configured:")
     
     # Switch gruplarını göster
-    switch_groups = {}
-    for device, config in device_configs.items():
-        if device.startswith('r') or device.startswith('vr'):
-            for interface in config['interfaces']:
-                if interface['connected_to'].startswith('s') or interface['connected_to'].startswith('vs'):
-                    switch = interface['connected_to']
-                    if switch not in switch_groups:
-                        switch_groups[switch] = []
-                    
-                    # Interface adını düzelt
-                    if device.startswith('vr'):
-                        interface_name = interface['name'].replace('eth', '')
-                    else:
-                        interface_name = interface['name'].replace('Ethernet', '')
-                    
-                    switch_groups[switch].append({
-                        'device': device,
-                        'interface': interface_name,
-                        'ip': interface['ip']
-                    })
-    
     print("\nSwitch groups:")
-    for switch, configs in sorted(switch_groups.items()):
-        if switch.startswith('vs'):
-            switch_id = 100 + int(switch[2:])
-        else:
-            switch_id = int(switch[1:])
-        print(f"\n{switch} group (192.168.{switch_id}.0/28):")
-        for config in sorted(configs, key=lambda x: x['device']):
-            print(f"  {config['device']}({config['interface']}): {config['ip']}")
+    for device in sorted(links.by_device):
+        lan_links = [links.links[link_id] for link_id in links.by_device[device]
+                     if links.links[link_id].kind == 'lan' and links.links[link_id].ends[1].device == device]
+        if not lan_links:
+            continue
+        print(f"\n{device} group ({lan_links[0].subnet}):")
+        for link in lan_links:
+            router = link.ends[0]
+            print(f"  {router.device}({router.port}): {router.ip}")
     
     # Router-Router bağlantılarını göster
-    router_links = []
-    for device, config in device_configs.items():
-        if device.startswith('r') or device.startswith('vr'):
-            for interface in config['interfaces']:
-                if interface['connected_to'].startswith('r') or interface['connected_to'].startswith('vr'):
-                    # Interface adını düzelt
-                    if device.startswith('vr'):
-                        interface_name = interface['name'].replace('eth', '')
-                    else:
-                        interface_name = interface['name'].replace('Ethernet', '')
-                    
-                    router_links.append({
-                        'device1': device,
-                        'interface1': interface_name,
-                        'ip1': interface['ip'],
-                        'device2': interface['connected_to'],
-                    })
-    
     print("\nRouter-Router connections:")
-    processed_links = set()
-    for link in sorted(router_links, key=lambda x: (x['device1'], x['device2'])):
-        link_key = tuple(sorted([link['device1'], link['device2']]))
-        if link_key not in processed_links:
-            processed_links.add(link_key)
-            # Karşı tarafın IP'sini bul
-            for other_link in router_links:
-                if other_link['device1'] == link['device2'] and other_link['device2'] == link['device1']:
-                    print(f"  {link['device1']}({link['interface1']}) <-> "
-                          f"{link['device2']}({other_link['interface1']}): "
-                          f"{link['ip1']} - {other_link['ip1']}")
-                    break
+    for link in links.links:
+        if link.kind == 'p2p':
+            end1, end2 = link.ends
+            print(f"  {end1.device}({end1.port}) <-> {end2.device}({end2.port}): "
+                  f"{end1.ip} - {end2.ip}")
+
+def plan_network(topology, allocator=None):
+    """Adresleri ayırır ve cihaz bazlı yapılandırmayı oluşturur, (device_configs, LinkTable) döndürür"""
+    if allocator is None:
+        allocator = IPAllocator()
+    links = build_link_table(topology, allocator)
+    
+    # Cihaz bazlı yapılandırma bilgilerini link tablosundan oluştur
+    device_configs = {}
+    for device in links.by_device:
+        interfaces = links.device_interfaces(device)
+        device_configs[device] = {
+            'interfaces': interfaces,
+            'config_lines': render_device_config(topology.nodes[device], interfaces),
+        }
+    return device_configs, links
+
+def host_vars_path(lab_name, device):
+    return f"clab-{lab_name}/host_vars/clab-{lab_name}-{device}.yml"
+
+def write_host_vars(device_configs, lab_name):
+    # Host vars dizinini oluştur
+    os.makedirs(f"clab-{lab_name}/host_vars", exist_ok=True)
     
-    return device_configs
+    # Her cihaz için host_vars dosyası oluştur, değişmeyenler yeniden yazılmaz
+    changed = 0
+    for device, config in device_configs.items():
+        changed += write_artifact(host_vars_path(lab_name, device), dump_yaml(config))
+    return changed
+
+def write_startup_configs(topology, yaml_content, device_configs, saved_configs=None):
+    """Her node'un day-0 config'ini (ya da snapshot'taki kaydedilmiş config'ini) açılış dosyasına yazar"""
+    changed = 0
+    for node in topology.nodes.values():
+        clab_node = yaml_content['topology']['nodes'][node.name]
+        if 'startup-config' in clab_node:
+            path = clab_node['startup-config']
+        else:
+            path = clab_node['binds'][0].split(':', 1)[0]
+        if saved_configs is not None:
+            changed += write_artifact(path, saved_configs[node.name])
+            continue
+        config = device_configs.get(node.name)
+        config_lines = config['config_lines'] if config else render_device_config(node, [])
+        changed += write_artifact(path, render_startup_config(node, config_lines))
+    return changed
+
+def create_network_vars(topology, allocator=None):
+    """Ağ yapılandırması için host_vars oluşturur, (device_configs, LinkTable) döndürür"""
+    device_configs, links = plan_network(topology, allocator)
+    write_host_vars(device_configs, topology.name)
+    print_link_summary(links)
+    return device_configs, links
+
+class CLIError(Exception):
+    """Cihaz CLI oturumunda oluşan hata"""
+
+class ConfigMismatch(CLIError):
+    """Cihazın running config'i oluşturulan yapılandırmayı içermiyor"""
+
+class AuthenticationError(CLIError):
+    """Cihaz kullanıcı adı/şifreyi reddetti"""
+
+class PromptError(CLIError):
+    """Cihaz beklenen prompt'a (ör. enable modu) geçmedi"""
+
+class CLITimeout(CLIError):
+    """Cihaz süresinde cevap vermedi ya da bağlantıyı kapattı"""
+
+class CommandRejected(CLIError):
+    """Cihaz bir yapılandırma komutunu reddetti"""
+
+TRANSPORT_ERRORS = (CLIError, OSError, asyncio.TimeoutError) + ((asyncssh.Error,) if asyncssh else ())
+
+def error_class(error):
+    """Transport hatasını yeniden deneme politikası sınıfına (RETRY_POLICIES anahtarı) çevirir"""
+    if isinstance(error, AuthenticationError) or (asyncssh and isinstance(error, asyncssh.PermissionDenied)):
+        return 'auth'
+    if isinstance(error, CommandRejected):
+        return 'rejected'
+    if isinstance(error, PromptError):
+        return 'prompt'
+    if isinstance(error, (CLITimeout, OSError, asyncio.TimeoutError) + ((asyncssh.Error,) if asyncssh else ())):
+        return 'timeout'
+    return 'error'
+
+def retry_delay(error, attempt):
+    # Sınıfın deneme hakkı bittiyse None, yoksa jitter'lı üstel backoff süresi
+    policy = RETRY_POLICIES[error_class(error)]
+    if attempt >= policy['attempts']:
+        return None
+    delay = min(policy['backoff_max'], policy['backoff_base'] * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+def ansible_error(message, unreachable=False):
+    # Ansible hata mesajını sınıflandırılmış CLIError'a çevir; sınıflandırılamayan unreachable zaman aşımıdır
+    types = {'auth': AuthenticationError, 'rejected': CommandRejected, 'prompt': PromptError, 'timeout': CLITimeout}
+    for name, pattern in ANSIBLE_ERROR_CLASSES:
+        if pattern.search(message):
+            return types[name](message)
+    return CLITimeout(message) if unreachable else CLIError(message)
+
+def get_probe_targets(topology):
+    """Topoloji node'larından hazırlık kontrolü hedeflerini oluşturur"""
+    return [{
+        'device': node.name,
+        'host': node.mgmt_ipv4,
+        'port': 22,
+        'protocol': 'ssh',
+        'group': node.group,
+        'inventory_host': f"clab-{topology.name}-{node.name}",
+    } for node in topology.nodes.values()]
+
+def attach_config_lines(targets, device_configs):
+    # create_network_vars çıktısındaki yapılandırmayı hedeflere ekle
+    for target in targets:
+        config = device_configs.get(target['device'])
+        if config is None:
+            target['config_lines'] = render_device_config(Node.from_name(target['device']), [])
+        else:
+            target['config_lines'] = config['config_lines']
+
+class CLISession:
+    """IOS CLI oturumu: prompt takibi, enable, config modu ve kaydetme"""
+    def __init__(self, reader, writer, close_callback, timeout=COMMAND_TIMEOUT):
+        self.reader = reader
+        self.writer = writer
+        self.close_callback = close_callback
+        self.timeout = timeout
+        self.buffer = b''
+        self.prompt_re = IOS_PROMPT_RE
+        self.prompt = ''
+
+    def close(self):
+        self.close_callback()
+
+    async def send(self, text):
+        self.writer.write(text.encode() + b'\r')
+        await self.writer.drain()
+
+    async def expect(self, *patterns):
+        # Pattern'lerden biri görünene kadar oku, (index, çıktı) döndür
+        end = time.monotonic() + self.timeout
+        while True:
+            for index, pattern in enumerate(patterns):
+                match = pattern.search(self.buffer)
+                if match:
+                    output = self.buffer[:match.end()]
+                    self.buffer = self.buffer[match.end():]
+                    return index, output.decode(errors='replace')
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise CLITimeout(f"timed out waiting for prompt (last output: {self.buffer[-80:]!r})")
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(4096), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if not chunk:
+                raise CLITimeout("connection closed by device")
+            self.buffer += chunk if isinstance(chunk, bytes) else chunk.encode()
+
+    def _learn_prompt(self, output):
+        # Hostname'i prompt'tan öğren, sonraki eşleşmeleri buna göre yap
+        self.prompt = output.strip().splitlines()[-1].strip()
+        match = re.match(r'[\w.\-]+', self.prompt)
+        if match is None:
+            raise PromptError(f"unexpected prompt: {self.prompt!r}")
+        hostname = match.group(0)
+        self.prompt_re = re.compile(re.escape(hostname).encode() + rb'(\([\w.\-]+\))?[>#]\s*$')
+
+    async def login(self, username, password, wake=False):
+        if wake:
+            await self.send('')
+        while True:
+            index, output = await self.expect(USERNAME_RE, PASSWORD_RE, LOGIN_FAILED_RE, IOS_PROMPT_RE)
+            if index == 0:
+                await self.send(username)
+            elif index == 1:
+                await self.send(password)
+            elif index == 2:
+                raise AuthenticationError("authentication failed")
+            else:
+                self._learn_prompt(output)
+                return
+
+    async def enable(self, password):
+        if self.prompt.endswith('#'):
+            return
+        await self.send('enable')
+        index, output = await self.expect(PASSWORD_RE, self.prompt_re)
+        if index == 0:
+            await self.send(password)
+            index, output = await self.expect(self.prompt_re)
+        self._learn_prompt(output)
+        if not self.prompt.endswith('#'):
+            raise PromptError("enable failed")
+
+    async def command(self, command):
+        await self.send(command)
+        index, output = await self.expect(self.prompt_re)
+        self._learn_prompt(output)
+        for line in output.splitlines():
+            if CLI_ERROR_RE.match(line.strip()):
+                raise CommandRejected(f"{command}: {line.strip()}")
+        return output
+
+    async def configure(self, lines):
+        await self.command('configure terminal')
+        for line in lines:
+            await self.command(line)
+        await self.command('end')
+
+    async def save(self):
+        # Destination filename / [confirm] prompt'larına Enter ile cevap ver
+        await self.send('copy running-config startup-config')
+        output = ''
+        while True:
+            index, chunk = await self.expect(SAVE_PROMPT_RE, self.prompt_re)
+            output += chunk
+            if index == 0:
+                await self.send('')
+                continue
+            break
+        if '[OK]' not in output and 'bytes copied' not in output:
+            raise CLIError(f"save failed: {output.strip()}")
+        return output
+
+async def open_cli_session(target, timeout):
+    """Hedef cihaza giriş yapılmış bir CLISession açar (ssh: asyncssh, tcp: düz CLI)"""
+    if target['protocol'] == 'tcp':
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(target['host'], target['port']), timeout)
+        session = CLISession(reader, writer, writer.close)
+        wake = False
+    else:
+        if asyncssh is None:
+            raise CLIError("native ssh transport requires asyncssh (pip install asyncssh)")
+        conn = await asyncio.wait_for(asyncssh.connect(
+            target['host'], port=target['port'], username=DEVICE_USERNAME, password=DEVICE_PASSWORD,
+            known_hosts=None, kex_algs=VIOS_SSH_KEX_ALGS
+        ), timeout)
+        process = await conn.create_process(term_type='vt100', encoding=None)
+        session = CLISession(process.stdout, process.stdin, conn.close)
+        wake = True
+    try:
+        await session.login(DEVICE_USERNAME, DEVICE_PASSWORD, wake=wake)
+    except BaseException:
+        session.close()
+        raise
+    return session
+
+async def read_banner(target, timeout):
+    # TCP portunu dene ve SSH banner'ını bekle
+    # (vrnetlab portu VM açılmadan önce kabul eder, bu yüzden banner şart)
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(target['host'], target['port']), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return 'tcp'
+    try:
+        if target['protocol'] == 'tcp':
+            banner = await asyncio.wait_for(reader.read(256), timeout)
+        else:
+            banner = await asyncio.wait_for(reader.readline(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        banner = b''
+    finally:
+        writer.close()
+    if target['protocol'] == 'tcp':
+        return None if banner else 'banner'
+    return None if banner.startswith(b'SSH-') else 'banner'
+
+async def check_ios_prompt(target, inventory_path, timeout):
+    # IOS prompt'unu kontrol et - CLI oturumu açılabiliyorsa doğrudan, yoksa tek host için ansible ping.
+    # Başarıda None, aksi halde sınıflandırılabilir hatayı döndürür
+    if target['protocol'] == 'tcp' or asyncssh is not None:
+        try:
+            session = await open_cli_session(target, timeout)
+        except TRANSPORT_ERRORS as e:
+            return e
+        session.close()
+        return None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            'ansible', target['inventory_host'], '-i', inventory_path, '-m', 'ping',
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+    except OSError as e:
+        print(f"Error during ping: {e}")
+        return e
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout * 3)
+    except asyncio.TimeoutError:
+        process.kill()
+        return CLITimeout("ansible ping timed out")
+    if process.returncode == 0:
+        return None
+    output = output.decode(errors='replace').strip()
+    return ansible_error(output or f"ansible ping exited with code {process.returncode}", True)
+
+async def wait_for_device(target, inventory_path, started_at, prompt_slots):
+    """Cihazı deadline'ına kadar jitter'lı backoff ile yoklar; hazırsa geçen süre, deadline'da None.
+    Açılmakta olan cihazın zaman aşımları deadline'a kadar beklenir, diğer prompt hataları (ör. şifre
+    reddi) RETRY_POLICIES'e göre denenir ve deneme hakkı bitince hata olarak yükseltilir"""
+    profile = READINESS_PROFILES[target['group']]
+    deadline = started_at + profile['deadline']
+    stages = ['tcp', 'banner', 'prompt']
+    last_stage = 'tcp'
+    attempt = 0
+    failures = collections.Counter()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"{target['device']} not ready after {profile['deadline']}s (last stage: {last_stage})")
+            return None
+        timeout = min(PROBE_TIMEOUT, remaining)
+        with TRACER.span('probe', target['device']) as span:
+            stage = await read_banner(target, timeout)
+            error = None
+            if stage is None:
+                async with prompt_slots:
+                    error = await check_ios_prompt(target, inventory_path, timeout)
+                stage = None if error is None else 'prompt'
+            span['failed_stage'] = stage
+            if error is not None:
+                span['error'] = str(error)
+        if stage is None:
+            elapsed = time.monotonic() - started_at
+            print(f"{target['device']} ready ({elapsed:.1f}s)")
+            return elapsed
+        # Cihaz bir sonraki aşamaya geçtiyse backoff'u sıfırla
+        if stages.index(stage) > stages.index(last_stage):
+            attempt = 0
+        last_stage = stage
+        delay = min(profile['backoff_max'], profile['backoff_base'] * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        attempt += 1
+        if error is not None and error_class(error) != 'timeout':
+            # Açılışla ilgisiz hata: sınıfın politikası uygulanır, auth hiç tekrar denenmez
+            failures[error_class(error)] += 1
+            delay = retry_delay(error, failures[error_class(error)])
+            if delay is None:
+                raise error
+        with TRACER.span('backoff', target['device']):
+            await asyncio.sleep(min(delay, max(0, deadline - time.monotonic())))
+
+def new_host_result():
+    return {'ok': 0, 'changed': 0, 'failed': 0, 'skipped': 0, 'unreachable': False,
+            'duration': 0.0, 'error': None}
+
+def apply_ansible_event(event, hosts, started_at):
+    """jsonl callback olayını host bazlı sonuç tablosuna işler, (host, durum, task) listesi döndürür"""
+    status = ANSIBLE_EVENT_STATUS.get(event.get('_event'))
+    if status is None:
+        return []
+    task = (event.get('task') or {}).get('name', '')
+    updates = []
+    for host, result in (event.get('hosts') or {}).items():
+        entry = hosts.setdefault(host, new_host_result())
+        entry['duration'] = time.monotonic() - started_at
+        if status == 'ok':
+            entry['ok'] += 1
+            if result.get('changed'):
+                entry['changed'] += 1
+                status = 'changed'
+        elif status == 'skipped':
+            entry['skipped'] += 1
+        else:
+            if status == 'unreachable':
+                entry['unreachable'] = True
+            else:
+                entry['failed'] += 1
+            entry['error'] = str(result.get('msg') or result.get('stderr') or result.get('stdout') or status)
+        updates.append((host, status, task))
+    return updates
+
+def print_ansible_event(host, status, task, entry):
+    # Canlı ilerleme: her host/task sonucunu geldiği anda göster
+    if status == 'skipped':
+        return
+    print(f"  {host}: {status} - {task}")
+    if status in ('failed', 'unreachable'):
+        print(f"    {entry['error']}")
+
+async def stream_ansible(command, on_event=None):
+    """ansible komutunu jsonl callback ile çalıştırır, çıktıyı satır satır işler"""
+    started_at = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        env=dict(os.environ, **ANSIBLE_EVENT_ENV), limit=ANSIBLE_EVENT_LINE_LIMIT
+    )
+    hosts = {}
+    # JSON olmayan satırlardan (hata mesajları vb.) sadece son birkaçını tut
+    tail = collections.deque(maxlen=ANSIBLE_TAIL_LINES)
+    async for raw in process.stdout:
+        line = raw.decode(errors='replace').strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            tail.append(line)
+            continue
+        if not isinstance(event, dict):
+            tail.append(line)
+            continue
+        for host, status, task in apply_ansible_event(event, hosts, started_at):
+            if on_event is not None:
+                on_event(host, status, task, hosts[host])
+    returncode = await process.wait()
+    return returncode, hosts, list(tail)
+
+def print_host_table(hosts):
+    # Host bazlı sonuç tablosu
+    if not hosts:
+        return
+    width = max(len('Host'), *(len(host) for host in hosts))
+    print(f"{'Host':<{width}}  {'Status':<11}  {'ok':>3}  {'changed':>7}  {'failed':>6}  {'time(s)':>7}  Error")
+    for host in sorted(hosts):
+        entry = hosts[host]
+        if entry['unreachable']:
+            status = 'unreachable'
+        elif entry['failed']:
+            status = 'failed'
+        else:
+            status = 'ok'
+        print(f"{host:<{width}}  {status:<11}  {entry['ok']:>3}  {entry['changed']:>7}  {entry['failed']:>6}  "
+              f"{entry['duration']:>7.1f}  {(entry['error'] or '').splitlines()[0] if entry['error'] else ''}")
+
+class AnsibleTransport:
+    """push_config.yaml'ı tek cihazla sınırlı çalıştıran yapılandırma backend'i"""
+    def __init__(self, inventory_path):
+        self.inventory_path = inventory_path
+
+    async def push(self, target):
+        returncode, hosts, tail = await stream_ansible([
+            'ansible-playbook', '-i', self.inventory_path, 'push_config.yaml',
+            '--limit', target['inventory_host']
+        ])
+        check_ansible_result(target, returncode, hosts, tail)
+
+    async def verify(self, target):
+        returncode, hosts, tail = await stream_ansible([
+            'ansible-playbook', '-i', self.inventory_path, 'verify_config.yaml',
+            '--limit', target['inventory_host']
+        ])
+        check_ansible_result(target, returncode, hosts, tail)
+
+    async def save(self, targets):
+        # Tüm hazır cihazlar tek playbook çalıştırmasında; değişmeyenlerde kayıt task'ı atlanır
+        try:
+            returncode, hosts, tail = await stream_ansible([
+                'ansible-playbook', '-i', self.inventory_path, 'save_config.yaml',
+                '--limit', ','.join(target['inventory_host'] for target in targets)
+            ], print_ansible_event)
+        except OSError as e:
+            returncode, hosts, tail = 1, {}, [str(e)]
+        print_host_table(hosts)
+        saves = {}
+        for target in targets:
+            entry = hosts.get(target['inventory_host'])
+            if entry is None:
+                saves[target['device']] = ('failed', ansible_error(
+                    '\n'.join(tail) or f"ansible-playbook exited with code {returncode}"))
+            elif entry['failed'] or entry['unreachable']:
+                saves[target['device']] = ('failed', ansible_error(entry['error'], entry['unreachable']))
+            else:
+                saves[target['device']] = ('saved' if entry['changed'] else 'unchanged', None)
+        return saves
+
+    async def collect(self, targets):
+        # Tüm cihazların kaydedilen config'ini tek playbook çalıştırmasıyla topla
+        with tempfile.TemporaryDirectory() as directory:
+            returncode, hosts, tail = await stream_ansible([
+                'ansible-playbook', '-i', self.inventory_path, 'collect_config.yaml',
+                '--limit', ','.join(target['inventory_host'] for target in targets),
+                '-e', f'snapshot_dir={os.path.abspath(directory)}'
+            ], None)
+            configs = {}
+            for target in targets:
+                try:
+                    with open(os.path.join(directory, f"{target['inventory_host']}.cfg")) as file:
+                        configs[target['device']] = file.read()
+                except OSError:
+                    raise CLIError((hosts.get(target['inventory_host']) or {}).get('error') or '\n'.join(tail)
+                                   or f"no configuration collected from {target['device']}")
+        return configs
+
+def check_ansible_result(target, returncode, hosts, tail):
+    # Tek hostluk playbook sonucunu CLIError'a çevir; doğrulama assert'i ConfigMismatch olur
+    entry = hosts.get(target['inventory_host'])
+    if entry is None or entry['failed'] or entry['unreachable'] or returncode != 0:
+        error = entry and entry['error']
+        if error and not entry['unreachable'] and error.startswith(VERIFY_FAILED_MSG):
+            raise ConfigMismatch(error)
+        raise ansible_error(error or '\n'.join(tail) or f"ansible-playbook exited with code {returncode}",
+                            bool(entry and entry['unreachable']))
+
+class NativeTransport:
+    """Ansible süreci başlatmadan asyncio CLI oturumu ile yapılandıran backend"""
+    async def push(self, target):
+        session = await open_cli_session(target, PROBE_TIMEOUT)
+        try:
+            await session.enable(DEVICE_PASSWORD)
+            await session.command('terminal length 0')
+            await session.configure(target['config_lines'])
+        finally:
+            session.close()
+
+    async def verify(self, target):
+        session = await open_cli_session(target, PROBE_TIMEOUT)
+        try:
+            await session.enable(DEVICE_PASSWORD)
+            await session.command('terminal length 0')
+            running = parse_interface_sections(await session.command('show running-config'))
+        finally:
+            session.close()
+        missing = config_mismatches(target['config_lines'], running)
+        if missing:
+            raise ConfigMismatch(f"{VERIFY_FAILED_MSG}: {', '.join(missing)}")
+
+    async def save(self, targets):
+        slots = asyncio.Semaphore(PIPELINE_WORKERS)
+
+        async def save_changed(target):
+            async with slots:
+                try:
+                    session = await open_cli_session(target, PROBE_TIMEOUT)
+                    try:
+                        await session.enable(DEVICE_PASSWORD)
+                        await session.command('terminal length 0')
+                        running = config_digest(await session.command('show running-config'))
+                        startup = config_digest(await session.command('show startup-config'))
+                        # NVRAM'e sadece içerik değiştiyse yazılır
+                        if running is not None and running == startup:
+                            return 'unchanged', None
+                        await session.save()
+                        return 'saved', None
+                    finally:
+                        session.close()
+                except TRANSPORT_ERRORS as e:
+                    return 'failed', e
+
+        outputs = await asyncio.gather(*(save_changed(target) for target in targets))
+        return {target['device']: output for target, output in zip(targets, outputs)}
+
+    async def collect(self, targets):
+        slots = asyncio.Semaphore(PIPELINE_WORKERS)
+
+        async def read_saved(target):
+            async with slots:
+                session = await open_cli_session(target, PROBE_TIMEOUT)
+                try:
+                    await session.enable(DEVICE_PASSWORD)
+                    await session.command('terminal length 0')
+                    return await session.command('show startup-config')
+                finally:
+                    session.close()
+
+        outputs = await asyncio.gather(*(read_saved(target) for target in targets))
+        return {target['device']: output for target, output in zip(targets, outputs)}
+
+def create_transport(name, inventory_path):
+    # CLI'dan seçilen yapılandırma backend'ini oluştur
+    if name == 'native':
+        return NativeTransport()
+    return AnsibleTransport(inventory_path)
+
+class WorkerBudget:
+    """Batch modunda aynı anda çalışan lab'lar arasında paylaşılan yapılandırma slotları"""
+    def __init__(self, size):
+        self.semaphore = threading.BoundedSemaphore(size)
+
+    async def __aenter__(self):
+        # Her lab kendi event loop'unda çalışır, bu yüzden thread semaphore'u bloklamadan beklenir
+        while not self.semaphore.acquire(blocking=False):
+            await asyncio.sleep(BUDGET_POLL_INTERVAL)
+
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+
+class NoBudget:
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+async def run_stage(stage, target, transport, span):
+    # Tek aşamayı çalıştır, cihaza push yapıldıysa True döndür
+    if stage == 'verify':
+        try:
+            await transport.verify(target)
+            return False
+        except ConfigMismatch as e:
+            # Açılış config'i uygulanmamış (ör. --diff ile değişen cihaz), tam yapılandırmaya dön
+            print(f"{target['device']}: {e}, pushing the rendered configuration")
+            span['fallback'] = str(e)
+    await transport.push(target)
+    return True
+
+async def configure_device(target, transport, inventory_path, started_at, prompt_slots, stage_slots, workers,
+                           budget, journal=None):
+    # Cihazı hazır olur olmaz kendi aşamalarından geçir
+    result = {'ready': None, 'completed': [], 'error': None, 'retries': 0, 'error_class': None, 'detail': None}
+    with TRACER.span('wait ready', target['device']):
+        try:
+            result['ready'] = await wait_for_device(target, inventory_path, started_at, prompt_slots)
+        except TRANSPORT_ERRORS as e:
+            result['error_class'], result['detail'] = error_class(e), str(e)
+            print(f"{target['device']} not ready ({result['error_class']}): {e}")
+    if result['ready'] is None:
+        result['error'] = 'not ready'
+        if result['error_class'] is None:
+            result['error_class'], result['detail'] = 'timeout', 'not ready before the deadline'
+        return result
+    pushed = False
+    for stage in target.get('stages', PIPELINE_STAGES):
+        for attempt in itertools.count(1):
+            error = None
+            queued = time.perf_counter()
+            async with workers, budget, stage_slots[stage]:
+                TRACER.add('queue', target['device'], queued, time.perf_counter(), {'stage': stage})
+                with TRACER.span(stage, target['device'], attempt=attempt) as span:
+                    try:
+                        pushed = await run_stage(stage, target, transport, span) or pushed
+                    except TRANSPORT_ERRORS as e:
+                        span['error'] = str(e)
+                        error = e
+            if error is None:
+                break
+            result['error_class'], result['detail'] = error_class(error), str(error)
+            delay = retry_delay(error, attempt)
+            if delay is None:
+                print(f"Error during {stage} on {target['device']} ({result['error_class']}): {error}")
+                result['error'] = stage
+                return result
+            # Bekleme slotların dışında yapılır, sağlıklı cihazlar bu cihazı beklemez
+            result['retries'] += 1
+            print(f"Error during {stage} on {target['device']} ({result['error_class']}): {error}, "
+                  f"retrying in {delay:.1f}s")
+            with TRACER.span('retry backoff', target['device']):
+                await asyncio.sleep(delay)
+        result['completed'].append(stage)
+        if journal is not None:
+            journal.record(target['device'], stage)
+    if pushed:
+        action = 'configured'
+    else:
+        action = 'verified' if result['completed'] else 'ready'
+    print(f"{target['device']} {action} ({time.monotonic() - started_at:.1f}s)")
+    return result
+
+async def _run_pipeline(targets, transport, inventory_path, started_at, budget=None, journal=None,
+                        workers=PIPELINE_WORKERS):
+    prompt_slots = asyncio.Semaphore(PROMPT_CHECK_CONCURRENCY)
+    stage_slots = {stage: asyncio.Semaphore(limit) for stage, limit in STAGE_CONCURRENCY.items()}
+    workers = asyncio.Semaphore(workers)
+    budget = budget or NoBudget()
+    results = await asyncio.gather(*(
+        configure_device(target, transport, inventory_path, started_at, prompt_slots, stage_slots, workers, budget,
+                         journal)
+        for target in targets
+    ))
+    results = {target['device']: result for target, result in zip(targets, results)}
+    await save_stage(transport, [target for target in targets if not results[target['device']]['error']], results,
+                     journal)
+    return results
+
+async def save_stage(transport, targets, results, journal=None):
+    """Yapılandırılan cihazları tek seferde kaydeder; zaten kayıtlı olanları atlar, hataları cihaza yazar"""
+    saves = {}
+    pending = targets
+    for attempt in itertools.count(1):
+        if not pending:
+            break
+        with TRACER.span('save', devices=len(pending), attempt=attempt):
+            saves.update(await transport.save(pending))
+        # Sadece kaydı başarısız olan cihazlar, hata sınıfının politikasıyla tekrar denenir
+        delays = {}
+        for target in pending:
+            status, error = saves[target['device']]
+            if status == 'failed':
+                result = results[target['device']]
+                result['error_class'], result['detail'] = error_class(error), str(error)
+                delay = retry_delay(error, attempt)
+                if delay is not None:
+                    delays[target['device']] = delay
+                    result['retries'] += 1
+                    print(f"Error during save on {target['device']} ({result['error_class']}): {error}, "
+                          f"retrying in {max(delays.values()):.1f}s")
+        pending = [target for target in pending if target['device'] in delays]
+        if pending:
+            with TRACER.span('retry backoff', devices=len(pending)):
+                await asyncio.sleep(max(delays.values()))
+    counts = collections.Counter(status for status, _ in saves.values())
+    for device, (status, error) in saves.items():
+        if status == 'failed':
+            print(f"Error during save on {device} ({results[device]['error_class']}): {error}")
+            results[device]['error'] = 'save'
+        else:
+            results[device]['completed'].append('save')
+            if journal is not None:
+                journal.record(device, 'save')
+    if saves:
+        print(f"Save: {counts['saved']} saved, {counts['unchanged']} already in sync, {counts['failed']} failed")
+
+def print_retry_outcomes(results):
+    # Yeniden denenen veya başarısız kalan cihazların son durumu
+    rows = {device: result for device, result in results.items() if result.get('retries') or result['error']}
+    if not rows:
+        return
+    width = max(len('Device'), *(len(device) for device in rows))
+    print(f"\n{'Device':<{width}}  {'Outcome':<9}  {'Stage':<9}  {'Retries':>7}  {'Class':<8}  Last error")
+    for device in sorted(rows):
+        result = rows[device]
+        outcome = 'failed' if result['error'] else 'recovered'
+        stage = result['error'] or '-'
+        detail = (result.get('detail') or '').splitlines()
+        print(f"{device:<{width}}  {outcome:<9}  {stage:<9}  {result.get('retries', 0):>7}  "
+              f"{result.get('error_class') or '-':<8}  {detail[0] if detail else ''}")
+
+def run_pipeline(targets, transport, inventory_path, started_at=None, budget=None, journal=None,
+                 workers=PIPELINE_WORKERS):
+    """Her cihazı hazırlık -> yapılandırma+kayıt aşamalarından bağımsız olarak geçirir"""
+    if not targets:
+        return {}
+    if started_at is None:
+        started_at = time.monotonic()
+    return asyncio.run(_run_pipeline(targets, transport, inventory_path, started_at, budget, journal, workers))
+
+class FakeIOSDevice:
+    """Gerçek cihaz olmadan test için basit IOS CLI sunucusu (login, enable, config, kaydetme)"""
+    def __init__(self, hostname, username=DEVICE_USERNAME, password=DEVICE_PASSWORD, startup_config=None,
+                 confirm_save=False):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        # Bazı IOS sürümleri NVRAM'in üzerine yazmadan önce ayrıca [confirm] sorar
+        self.confirm_save = confirm_save
+        self.running = {}
+        self.startup = None
+        self.server = None
+        self.connections = set()
+        if startup_config is not None:
+            # Day-0: cihaz startup config ile açılmış gibi başlar
+            self.startup = parse_interface_sections(startup_config)
+            self.running = {name: list(body) for name, body in self.startup.items()}
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    async def stop(self):
+        # Sunucuyu kapat ve açık oturumların istemci tarafından kapatılmasını bekle
+        self.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+    def config_text(self, interfaces):
+        lines = [f'hostname {self.hostname}', '!']
+        for interface, body in interfaces.items():
+            lines.append(f'interface {interface}')
+            lines += [' ' + line for line in body]
+            lines.append('!')
+        lines.append('end')
+        return '\r\n'.join(lines) + '\r\n'
 
-def deploy_lab(yaml_file, lab_name, connections, reconfigure=False):
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self._session(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def _readline(self, reader, writer, echo=True):
+        line = (await reader.readuntil(b'\r')).strip(b'\r\n').decode()
+        if echo:
+            writer.write(line.encode() + b'\r\n')
+        return line
+
+    async def _session(self, reader, writer):
+        writer.write(b'\r\nUser Access Verification\r\n\r\nUsername: ')
+        username = await self._readline(reader, writer)
+        writer.write(b'Password: ')
+        password = await self._readline(reader, writer, echo=False)
+        if (username, password) != (self.username, self.password):
+            writer.write(b'\r\n% Login invalid\r\n\r\n')
+            return
+        mode = 'exec'
+        interface = None
+        prompts = {'exec': '>', 'priv': '#', 'config': '(config)#', 'config-if': '(config-if)#'}
+        while True:
+            writer.write(f'\r\n{self.hostname}{prompts[mode]}'.encode())
+            command = await self._readline(reader, writer)
+            words = command.split()
+            if not words:
+                continue
+            if mode in ('exec', 'priv') and command == 'exit':
+                return
+            if mode in ('exec', 'priv') and command.startswith('terminal '):
+                continue
+            if mode == 'exec' and command == 'enable':
+                writer.write(b'Password: ')
+                if await self._readline(reader, writer, echo=False) == self.password:
+                    mode = 'priv'
+                else:
+                    writer.write(b'% Access denied\r\n')
+            elif mode == 'priv' and command == 'configure terminal':
+                writer.write(b'Enter configuration commands, one per line.  End with CNTL/Z.\r\n')
+                mode = 'config'
+            elif mode == 'priv' and command == 'copy running-config startup-config':
+                writer.write(b'Destination filename [startup-config]? ')
+                await self._readline(reader, writer)
+                if self.confirm_save:
+                    writer.write(b'Overwrite the previous NVRAM configuration?[confirm]')
+                    await self._readline(reader, writer)
+                writer.write(b'Building configuration...\r\n[OK]\r\n')
+                self.startup = {name: list(body) for name, body in self.running.items()}
+            elif mode == 'priv' and command == 'show running-config':
+                text = self.config_text(self.running)
+                writer.write(f'Building configuration...\r\n\r\nCurrent configuration : {len(text)} bytes\r\n'.encode())
+                writer.write(text.encode())
+            elif mode == 'priv' and command == 'show startup-config':
+                if self.startup is None:
+                    writer.write(b'startup-config is not present\r\n')
+                else:
+                    writer.write(self.config_text(self.startup).encode())
+            elif mode in ('config', 'config-if') and command == 'end':
+                mode = 'priv'
+            elif mode in ('config', 'config-if') and words[0] == 'interface' and len(words) == 2:
+                interface = words[1]
+                self.running.setdefault(interface, [])
+                mode = 'config-if'
+            elif mode == 'config' and words[0] == 'hostname' and len(words) == 2:
+                self.hostname = words[1]
+            elif mode == 'config-if' and command == 'exit':
+                mode = 'config'
+            elif mode == 'config-if' and (words[0] in ('ip', 'shutdown', 'description') or command == 'no shutdown'):
+                # Aynı ayarın önceki değerini (ve 'no' biçimini) değiştir
+                key = ' '.join(words[:2]) if words[0] == 'ip' else 'shutdown'
+                body = self.running[interface]
+                body[:] = [line for line in body if not line.replace('no ', '', 1).startswith(key)]
+                body.append(command)
+            else:
+                writer.write(b"% Invalid input detected at '^' marker.\r\n")
+
+def expected_interfaces(config_lines):
+    # Yapılandırma satırlarından beklenen interface -> satırlar eşlemesini çıkar
+    interfaces = {}
+    body = None
+    for line in config_lines:
+        if line.startswith('interface '):
+            body = interfaces.setdefault(line.split()[1], [])
+        else:
+            body.append(line)
+    return interfaces
+
+def parse_interface_sections(text):
+    # IOS config metninden interface -> (girintisiz) satırlar eşlemesini çıkar
+    interfaces = {}
+    body = None
+    for line in text.splitlines():
+        line = line.rstrip()
+        if line.startswith('interface '):
+            body = interfaces.setdefault(line.split()[1], [])
+        elif body is not None and line.startswith(' '):
+            body.append(line.strip())
+        else:
+            body = None
+    return interfaces
+
+def config_mismatches(config_lines, running):
+    """Running config'te eksik olan adresleri ve kapalı kalan interface'leri listeler"""
+    missing = []
+    for interface, body in expected_interfaces(config_lines).items():
+        actual = running.get(interface)
+        if actual is None:
+            missing.append(f"interface {interface}")
+            continue
+        missing += [f"{interface} {line}" for line in body if line.startswith('ip address ') and line not in actual]
+        if 'no shutdown' in body and 'shutdown' in actual:
+            missing.append(f"{interface} no shutdown")
+    return missing
+
+async def _run_fake_lab(targets, startup_configs=None):
+    # Her node için yerel bir sahte IOS cihazı başlat ve native backend ile yapılandır
+    devices = {}
+    for target in targets:
+        startup_config = (startup_configs or {}).get(target['device'])
+        device = FakeIOSDevice(target['device'], startup_config=startup_config)
+        target.update({'host': '127.0.0.1', 'port': await device.start(), 'protocol': 'tcp'})
+        devices[target['device']] = device
+    try:
+        results = await _run_pipeline(targets, NativeTransport(), None, time.monotonic())
+    finally:
+        for device in devices.values():
+            device.close()
+    return results, devices
+
+def verify_links(links, saved):
+    # Her bağlantının IP atanmış uçlarının kaydedilen config'te olduğunu kontrol et
+    missing = 0
+    for link in links.links:
+        for end in link.ends:
+            if end.ip is None:
+                continue
+            body = (saved.get(end.device) or {}).get(ios_interface_name(end.name), [])
+            if ip_address_line(end.ip) not in body:
+                print(f"link {link.id}: {end.device} {end.name} is missing {end.ip}")
+                missing += 1
+    return missing
+
+def run_fake_lab(targets, links, startup_configs=None):
+    """Yapılandırmayı sahte IOS cihazlarına uygular (day-0'da doğrular) ve kaydedilen config'i doğrular"""
+    results, devices = asyncio.run(_run_fake_lab(targets, startup_configs))
+    verified = 0
+    for target in targets:
+        device = devices[target['device']]
+        if device.startup == expected_interfaces(target['config_lines']):
+            verified += 1
+        else:
+            print(f"{target['device']}: saved configuration does not match the rendered configuration")
+    missing = verify_links(links, {name: device.startup for name, device in devices.items()})
+    print_retry_outcomes(results)
+    print(f"{verified}/{len(targets)} fake devices configured and verified, "
+          f"{len(links.links)} links checked ({missing} endpoints missing)")
+    return results
+
+def print_manual_commands(inventory_path, targets, results):
+    # Tamamlanmayan cihazlar için manuel yapılandırma komutlarını göster
+    pending = [t for t in targets if results[t['device']]['error']]
+    if not pending:
+        return
+    print("\nSome devices were not configured. You may need to configure them manually.")
+    print("\nManual configuration commands:")
+    limit = ','.join(target['inventory_host'] for target in pending)
+    print(f"ansible-playbook -i {inventory_path} push_config.yaml --limit {limit}")
+    print(f"ansible-playbook -i {inventory_path} save_config.yaml --limit {limit}")
+    print("Or run again with --resume to continue from the completed steps")
+
+def state_path(lab_name):
+    # Son uygulanan durum clab-<lab_name>/ dizininin yanında tutulur (--reconfigure dizini silebilir)
+    return f"clab-{lab_name}.state.json"
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def link_key(endpoints):
+    # Uç nokta sırasından bağımsız bağlantı anahtarı
+    return '|'.join(sorted(endpoints))
+
+def build_state(yaml_content, device_configs, allocator):
+    """Topolojinin ve cihaz yapılandırmalarının karşılaştırılabilir özetini oluşturur"""
+    nodes = yaml_content['topology']['nodes']
+    links = sorted(link_key(link['endpoints']) for link in yaml_content['topology']['links'])
+    state = {
+        'version': STATE_VERSION,
+        # Açılış dalgaları host yüküne bağlıdır, node tanımının parçası sayılmaz
+        'nodes': {name: content_hash({key: value for key, value in node.items() if key != 'stages'})
+                  for name, node in nodes.items()},
+        'links': links,
+        'configs': {name: content_hash(config['config_lines']) for name, config in device_configs.items()},
+        'interfaces': {name: [ios_interface_name(i['name']) for i in config['interfaces']]
+                       for name, config in device_configs.items()},
+        'pools': allocator.pools(),
+        'allocations': allocator.assignments,
+        'mgmt': {name: node['mgmt-ipv4'] for name, node in nodes.items()},
+    }
+    state['topology_hash'] = content_hash([state['nodes'], state['links'], state['configs']])
+    return state
+
+def load_state(lab_name):
     try:
-        # Config dizinini oluştur
-        config_dir = "config"
-        if not os.path.exists(config_dir):
-            os.makedirs(config_dir)
-            print(f"'{config_dir}' directory created")
+        with open(state_path(lab_name), 'r') as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+def save_state(lab_name, state):
+    write_artifact(state_path(lab_name), json.dumps(state, indent=1, sort_keys=True))
+
+def previous_mgmt(lab_name, incremental=False, resume=False):
+    """--diff ile (ya da --diff'li çalıştırma devam ettirilirken) önceki deploy'un yönetim adresleri"""
+    if resume:
+        journal = DeployJournal.load(lab_name)
+        incremental = journal is not None and journal.data['incremental']
+    state = load_state(lab_name) if incremental else None
+    return state.get('mgmt') if state else None
+
+def journal_path(lab_name):
+    return f"clab-{lab_name}/journal.json"
+
+class DeployJournal:
+    """Kesilen bir deploy'un kaldığı yer: cihaz bazında tamamlanan aşamalar, her adımdan sonra atomik yazılır"""
+    def __init__(self, lab_name, data):
+        self.lab_name = lab_name
+        self.data = data
+
+    @classmethod
+    def create(cls, lab_name, incremental, stages, configs, removed_interfaces):
+        journal = cls(lab_name, {
+            'version': STATE_VERSION,
+            'incremental': incremental,
+            'removed_interfaces': removed_interfaces,
+            'devices': {device: {'config': configs.get(device), 'stages': list(stages[device]), 'completed': []}
+                        for device in sorted(stages)},
+        })
+        journal.write()
+        return journal
+
+    @classmethod
+    def load(cls, lab_name):
+        try:
+            with open(journal_path(lab_name), 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return cls(lab_name, data) if data.get('version') == STATE_VERSION else None
+
+    @property
+    def devices(self):
+        return self.data['devices']
+
+    def write(self):
+        write_artifact(journal_path(self.lab_name), json.dumps(self.data, indent=1, sort_keys=True))
+
+    def remaining(self, device, config_hash):
+        """Cihazın kalan aşamaları ve kaydedilip kaydedilmediği; yapılandırma değiştiyse baştan"""
+        entry = self.devices[device]
+        if entry['config'] != config_hash:
+            print(f"{device}: configuration changed since the interrupted run, starting it over")
+            entry['config'] = config_hash
+            entry['completed'] = []
+        return [stage for stage in entry['stages'] if stage not in entry['completed']], 'save' not in entry['completed']
+
+    def record(self, device, step):
+        self.devices[device]['completed'].append(step)
+        self.write()
+
+def diff_state(old, new):
+    """İki durum arasındaki eklenen/silinen/değişen node ve bağlantıları hesaplar"""
+    old_nodes, new_nodes = old['nodes'], new['nodes']
+    changes = {
+        'added_nodes': sorted(new_nodes.keys() - old_nodes.keys()),
+        'removed_nodes': sorted(old_nodes.keys() - new_nodes.keys()),
+        'changed_nodes': sorted(n for n in new_nodes.keys() & old_nodes.keys() if new_nodes[n] != old_nodes[n]),
+        'added_links': sorted(set(new['links']) - set(old['links'])),
+        'removed_links': sorted(set(old['links']) - set(new['links'])),
+    }
+    # Yeni veya tanımı değişen node'lar yeniden oluşturulur
+    redeploy = set(changes['added_nodes']) | set(changes['changed_nodes'])
+    changes['redeploy'] = sorted(redeploy)
+    # Yeniden oluşturulanlar ve hedef yapılandırması değişenler yeniden yapılandırılır
+    changes['configure'] = sorted(redeploy | {
+        name for name, digest in new['configs'].items() if old['configs'].get(name) != digest
+    })
+    # Yerinde yapılandırılan cihazlarda artık kullanılmayan interface'ler temizlenir
+    changes['removed_interfaces'] = {}
+    for name in changes['configure']:
+        if name not in redeploy:
+            stale = sorted(set(old['interfaces'].get(name, [])) - set(new['interfaces'].get(name, [])))
+            if stale:
+                changes['removed_interfaces'][name] = stale
+    return changes
+
+def print_changes(changes):
+    print("\nChanges since the last deploy:")
+    for key in ('added_nodes', 'removed_nodes', 'changed_nodes', 'added_links', 'removed_links', 'configure'):
+        if changes[key]:
+            print(f"  {key.replace('_', ' ')}: {', '.join(changes[key])}")
+
+def snapshot_key(yaml_content, allocator):
+    """Node tipi, image ve yönetim adresleri, bağlantılar ve adres havuzlarından snapshot anahtarı oluşturur"""
+    # Dosya yolları ve açılış dalgaları anahtara girmez, aynı topoloji her dizinde aynı snapshot'ı bulur.
+    # Kaydedilen config yönetim arayüzünün adresini de içerir, başka adresli node bu config'le açılmamalı
+    nodes = {name: [node['kind'], node['image'], node.get('type'), node['mgmt-ipv4']]
+             for name, node in yaml_content['topology']['nodes'].items()}
+    links = sorted(link_key(link['endpoints']) for link in yaml_content['topology']['links'])
+    return content_hash([SNAPSHOT_VERSION, nodes, links, allocator.pools()])
+
+def config_digest(output):
+    """Config çıktısının zaman damgası ve başlık satırları hariç özeti, config eksikse None"""
+    config = clean_saved_config(output)
+    if config is None:
+        return None
+    return hashlib.sha256(re.sub(SAVE_IGNORED_LINES, '', config).strip().encode()).hexdigest()
+
+def clean_saved_config(output):
+    # 'show startup-config' çıktısından başlık ve prompt'u at, 'end' yoksa config eksik sayılır
+    lines = [line.rstrip() for line in output.splitlines()]
+    start = next((i for i, line in enumerate(lines) if line.startswith(('!', 'version ', 'hostname '))), None)
+    if start is None or 'end' not in lines[start:]:
+        return None
+    end = len(lines) - lines[::-1].index('end')
+    return '\n'.join(lines[start:end]) + '\n'
+
+class SnapshotCache:
+    """Başarılı deploy'lardan toplanan cihaz config'leri; boyut sınırı aşılınca en eski kullanılan silinir"""
+    def __init__(self, directory=SNAPSHOT_DIR, max_size=SNAPSHOT_CACHE_SIZE * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        # Batch modunda lab thread'leri aynı cache'i paylaşır
+        self.lock = threading.Lock()
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key, 'meta.json')
+
+    def _write_meta(self, key, meta):
+        tmp = f"{self._meta_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as file:
+            json.dump(meta, file, indent=1, sort_keys=True)
+        os.replace(tmp, self._meta_path(key))
+
+    def entries(self):
+        """Cache girdilerini son kullanım sırasına göre (en eski önce) döndürür"""
+        entries = []
+        for key in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            try:
+                with open(self._meta_path(key)) as file:
+                    meta = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if meta.get('version') == SNAPSHOT_VERSION:
+                entries.append(dict(meta, key=key))
+        return sorted(entries, key=lambda entry: entry['used'])
+
+    def lookup(self, key):
+        """Anahtara ait cihaz config'lerini döndürür, yoksa None"""
+        with self.lock:
+            try:
+                with open(self._meta_path(key)) as file:
+                    meta = json.load(file)
+                configs = {}
+                for device in meta['devices']:
+                    with open(os.path.join(self.directory, key, f"{device}.cfg")) as file:
+                        configs[device] = file.read()
+            except (OSError, ValueError, KeyError):
+                return None
+            if meta.get('version') != SNAPSHOT_VERSION:
+                return None
+            meta['used'] = time.time()
+            meta['hits'] = meta.get('hits', 0) + 1
+            self._write_meta(key, meta)
+        return configs
+
+    def store(self, key, lab_name, images, configs):
+        """Config'leri atomik olarak kaydeder ve boyut sınırı için eski girdileri siler, silinenleri döndürür"""
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            # Yarım yazılmış girdi hiçbir zaman görünmez: önce geçici dizine yaz, sonra yeniden adlandır
+            tmp = tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory)
+            try:
+                size = 0
+                for device, config in configs.items():
+                    with open(os.path.join(tmp, f"{device}.cfg"), 'w') as file:
+                        size += file.write(config)
+                now = time.time()
+                meta = {'version': SNAPSHOT_VERSION, 'lab': lab_name, 'images': images,
+                        'devices': sorted(configs), 'size': size, 'created': now, 'used': now, 'hits': 0}
+                with open(os.path.join(tmp, 'meta.json'), 'w') as file:
+                    json.dump(meta, file, indent=1, sort_keys=True)
+                self._remove(key)
+                os.rename(tmp, os.path.join(self.directory, key))
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            return self._evict(keep=key)
+
+    def _remove(self, key):
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+    def _evict(self, keep=None):
+        # Toplam boyut sınırın altına inene kadar en uzun süredir kullanılmayan girdileri sil
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        evicted = []
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry['key'] == keep:
+                continue
+            self._remove(entry['key'])
+            total -= entry['size']
+            evicted.append(entry['key'])
+        return evicted
+
+    def prune(self, max_age_days):
+        """Belirtilen günden uzun süredir kullanılmayan girdileri (0: hepsini) siler"""
+        with self.lock:
+            cutoff = time.time() - max_age_days * 86400
+            pruned = [entry['key'] for entry in self.entries() if entry['used'] <= cutoff]
+            for key in pruned:
+                self._remove(key)
+            return pruned
+
+def print_snapshot_cache(cache):
+    # Cache girdileri tablosu
+    entries = cache.entries()
+    if not entries:
+        print(f"Snapshot cache is empty: {cache.directory}")
+        return
+    width = max([len('Lab')] + [len(entry['lab']) for entry in entries])
+    print(f"{'Key':<12}  {'Lab':<{width}}  {'Devices':>7}  {'Size':>9}  {'Hits':>4}  {'Last used':<16}  Images")
+    for entry in reversed(entries):
+        used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['used']))
+        print(f"{entry['key'][:12]}  {entry['lab']:<{width}}  {len(entry['devices']):>7}  {entry['size']:>9}  "
+              f"{entry.get('hits', 0):>4}  {used:<16}  {', '.join(entry['images'])}")
+    print(f"{len(entries)} snapshots, {sum(entry['size'] for entry in entries)} bytes "
+          f"(limit {cache.max_size} bytes) in {cache.directory}")
+
+def find_snapshot(cache, yaml_content, allocator, lab_name, incremental):
+    """Sıfırdan deploy edilecek topoloji için cache'teki config'leri {'key', 'configs'} olarak döndürür"""
+    # Artımlı modda lab zaten ayaktaysa snapshot kullanılmaz
+    if cache is None or (incremental and load_state(lab_name) is not None):
+        return None
+    key = snapshot_key(yaml_content, allocator)
+    configs = cache.lookup(key)
+    if configs is None:
+        print(f"No snapshot for this topology ({key[:12]}), devices will be configured after boot")
+        return None
+    print(f"Snapshot {key[:12]} found, devices boot from their cached configs")
+    return {'key': key, 'configs': configs}
+
+def collect_snapshot(cache, transport, targets, yaml_content, allocator, lab_name):
+    """Başarıyla yapılandırılan cihazların kaydedilen config'lerini toplayıp cache'e ekler"""
+    try:
+        outputs = asyncio.run(transport.collect(targets))
+    except TRANSPORT_ERRORS as e:
+        print(f"Snapshot not stored, collecting configurations failed: {e}")
+        return
+    configs = {}
+    for device, output in outputs.items():
+        config = clean_saved_config(output)
+        if config is None:
+            print(f"Snapshot not stored, saved configuration of {device} is incomplete")
+            return
+        configs[device] = config
+    key = snapshot_key(yaml_content, allocator)
+    images = sorted({node['image'] for node in yaml_content['topology']['nodes'].values()})
+    try:
+        evicted = cache.store(key, lab_name, images, configs)
+    except OSError as e:
+        print(f"Snapshot not stored: {e}")
+        return
+    print(f"Snapshot {key[:12]} stored ({len(configs)} devices)")
+    if evicted:
+        print(f"Evicted {len(evicted)} old snapshots to stay under the cache size limit")
+
+def linux_interface_name(interface):
+    # Containerlab arayüz adı: IOL EthernetX/Y -> eth(X*4+Y), VIOS ethN aynen
+    match = re.fullmatch(r'Ethernet(\d+)/(\d+)', interface)
+    if match:
+        return f"eth{int(match.group(1)) * 4 + int(match.group(2))}"
+    return interface
+
+class LabOutput(io.TextIOBase):
+    """Batch modunda her lab thread'inin çıktısını kendi log dosyasına yönlendiren stdout"""
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def target(self):
+        return getattr(self.local, 'file', self.default)
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def fileno(self):
+        return self.target().fileno()
+
+def run_command(command, check=True):
+    # Harici komutun çıktısı, batch modunda lab'ın log dosyasına gider
+    if isinstance(sys.stdout, LabOutput):
+        sys.stdout.flush()
+        return subprocess.run(command, check=check, stdout=sys.stdout.fileno(), stderr=subprocess.STDOUT)
+    return subprocess.run(command, check=check)
+
+def apply_topology_changes(yaml_file, lab_name, changes, topology_links):
+    """Sadece değişen node ve bağlantıları containerlab/docker üzerinde uygular"""
+    redeploy = set(changes['redeploy'])
+    # Silinen node'ların container'larını kaldır
+    for node in changes['removed_nodes']:
+        print(f"Removing node {node}")
+        run_command(['docker', 'rm', '-f', f"clab-{lab_name}-{node}"], check=False)
+    # Silinen bağlantıları (her iki ucu da yerinde kalıyorsa) kaldır
+    removed = set(changes['removed_nodes'])
+    for link in changes['removed_links']:
+        ends = [end.split(':', 1) for end in link.split('|')]
+        if any(node in removed or node in redeploy for node, _ in ends):
+            continue
+        node, interface = ends[0]
+        print(f"Removing link {link}")
+        run_command(['docker', 'exec', f"clab-{lab_name}-{node}", 'ip', 'link', 'del',
+                        linux_interface_name(interface)], check=False)
+    # Yeni/değişen node'ları yeniden oluştur (aralarındaki bağlantılar containerlab tarafından kurulur)
+    if redeploy:
+        run_command(['containerlab', 'deploy', '-t', yaml_file, '--reconfigure',
+                     '--node-filter', ','.join(changes['redeploy'])], check=True)
+    # Eklenen bağlantıları ve yeniden oluşturulan node'ların eski komşularına bağlantılarını kur
+    added = set(changes['added_links'])
+    for link in topology_links:
+        (node1, interface1), (node2, interface2) = (end.split(':', 1) for end in link['endpoints'])
+        inside = (node1 in redeploy) + (node2 in redeploy)
+        if inside == 2 or (inside == 0 and link_key(link['endpoints']) not in added):
+            continue
+        print(f"Creating link {node1}:{interface1} <-> {node2}:{interface2}")
+        run_command(['containerlab', 'tools', 'veth', 'create',
+                     '-a', f"clab-{lab_name}-{node1}:{linux_interface_name(interface1)}",
+                     '-b', f"clab-{lab_name}-{node2}:{linux_interface_name(interface2)}"], check=True)
+
+def deploy_lab(yaml_file, topology, yaml_content, reconfigure=False, transport='ansible', allocator=None,
+               incremental=False, budget=None, boot_workers=None, day0=False, cache=None, snapshot=None,
+               resume=False, workers=PIPELINE_WORKERS):
+    """Lab'ı deploy edip yapılandırır; cihaz sonuçlarını, deploy başarısızsa None döndürür"""
+    lab_name = topology.name
+    try:
+        if allocator is None:
+            allocator = IPAllocator()
+        journal = DeployJournal.load(lab_name) if resume else None
+        if resume:
+            if journal is None:
+                print(f"No journal found in clab-{lab_name}/, nothing to resume (the lab deploy did not finish)")
+                return None
+            # Kesilen çalıştırmayla aynı adresler için onun modunu kullan
+            incremental = journal.data['incremental']
+        # Artımlı modda önceki atamaları koru
+        old_state = load_state(lab_name) if incremental else None
+        if old_state is not None and old_state['pools'] == allocator.pools():
+            allocator.pin(old_state['allocations'])
         
-        # YAML dosyasını oku
-        with open(yaml_file, 'r') as file:
-            yaml_content = yaml.safe_load(file)
+        # Cihazlar yapılandırılmış açılıyorsa (day-0 ya da snapshot) sadece doğrulanır
+        boot_configured = day0 or snapshot is not None
+        # VIOS cihazlarının bind edilen başlangıç config dosyalarını oluştur (day-0'da tam config yazılır).
+        # Önceki day-0/snapshot deploy'undan kalan tam config eski adreslerle açtırır, her seferinde yeniden yazılır
+        if not boot_configured:
+            changed = 0
+            for node in topology.nodes.values():
+                if node.vios:
+                    cfg_file = yaml_content['topology']['nodes'][node.name]['binds'][0].split(':', 1)[0]
+                    changed += write_artifact(cfg_file, render_startup_config(node, []))
+            if changed:
+                print(f"Minimal VIOS startup configs written ({changed} files changed)")
         
-        # YAML dosyasını güncelle - vr ve vs cihazları için config yollarını değiştir
-        for device_name, device_config in yaml_content['topology']['nodes'].items():
-            if device_name.startswith('vr') or device_name.startswith('vs'):
-                if 'binds' in device_config:
-                    new_binds = []
-                    for bind in device_config['binds']:
-                        if '.cfg:' in bind:
-                            # Yeni config yolu
-                            cfg_file = f"{config_dir}/{device_name}.cfg"
-                            new_bind = f"{cfg_file}:/config/startup-config.cfg"
-                            new_binds.append(new_bind)
-                            
-                            # Dosya yoksa oluştur
-                            if not os.path.exists(cfg_file):
-                                print(f"Creating empty configuration file: {cfg_file}")
-                                with open(cfg_file, 'w') as f:
-                                    # Temel yapılandırma ekle
-                                    f.write("hostname " + device_name + "\n")
-                                    f.write("enable secret admin\n")
-                                    f.write("username admin privilege 15 secret admin\n")
-                                    f.write("line vty 0 4\n")
-                                    f.write(" login local\n")
-                        else:
-                            new_binds.append(bind)
-                    device_config['binds'] = new_binds
+        # Adresleri ayır ve cihaz yapılandırmalarını oluştur
+        with TRACER.span('plan'):
+            device_configs, links = plan_network(topology, allocator)
+            state = build_state(yaml_content, device_configs, allocator)
         
-        # Güncellenmiş YAML dosyasını yaz
-        with open(yaml_file, 'w') as file:
-            yaml.dump(yaml_content, file, default_flow_style=False, sort_keys=False)
+        if snapshot is not None and old_state is None:
+            # Önceki başarılı deploy'da kaydedilen config'ler açılış config'i olur
+            with TRACER.span('startup configs'):
+                changed = write_startup_configs(topology, yaml_content, device_configs, snapshot['configs'])
+            print(f"Startup configs restored from snapshot ({changed}/{len(topology.nodes)} files changed)")
+        elif day0 and not resume:
+            # Cihazlar açılışta tam yapılandırmayı yükler, deploy sonrası sadece doğrulanır
+            with TRACER.span('startup configs'):
+                changed = write_startup_configs(topology, yaml_content, device_configs)
+            print(f"Day-0 startup configs rendered ({changed}/{len(topology.nodes)} files changed)")
         
-        # Containerlab deploy komutunu çalıştır
-        if reconfigure:
-            subprocess.run(['containerlab', 'deploy', '-t', yaml_file, '--reconfigure'], check=True)
+        if resume:
+            # Lab ayakta; kesilen çalıştırmanın cihazları ve kaldırılan interface'leri journal'da
+            configure = set(journal.devices)
+            changes = {'removed_interfaces': journal.data['removed_interfaces']}
+            print(f"Resuming {lab_name} from {journal_path(lab_name)}, skipping containerlab deploy")
+        elif old_state is None:
+            if incremental:
+                print("No previous deploy state found, deploying the whole lab")
+            # Containerlab deploy komutunu çalıştır
+            command = ['containerlab', 'deploy', '-t', yaml_file]
+            if reconfigure:
+                command.append('--reconfigure')
+            if boot_workers:
+                # Aynı anda oluşturulan node sayısını açılış dalgasıyla sınırla
+                command += ['--max-workers', str(boot_workers)]
+            with TRACER.span('containerlab deploy'):
+                run_command(command, check=True)
+            configure = set(device_configs)
+            changes = {'removed_interfaces': {}}
         else:
-            subprocess.run(['containerlab', 'deploy', '-t', yaml_file], check=True)
+            # Sadece değişen node ve bağlantıları uygula
+            changes = diff_state(old_state, state)
+            if old_state['topology_hash'] == state['topology_hash']:
+                print("Lab is up to date, nothing to redeploy")
+                return {}
+            print_changes(changes)
+            with TRACER.span('apply changes'):
+                apply_topology_changes(yaml_file, lab_name, changes, yaml_content['topology']['links'])
+            configure = set(changes['configure'])
+        deployed_at = time.monotonic()
         
-        print(f"Lab successfully deployed: {lab_name}")
+        if not resume:
+            print(f"Lab successfully deployed: {lab_name}")
+            # Eski adresi kaldırılacak cihazlar startup config'ten açılmamıştır, doğrudan push edilir
+            stages = {device: DAY0_STAGES if boot_configured and device not in changes['removed_interfaces']
+                      else PIPELINE_STAGES for device in configure}
+            journal = DeployJournal.create(lab_name, incremental, stages, state['configs'],
+                                           changes['removed_interfaces'])
         
-        # Inventory dosyasının oluşmasını bekle
+        # Inventory dosyasının yazılıp kapanmasını bekle, yarım dosya parse edilmez
         inventory_path = f"clab-{lab_name}/ansible-inventory.yml"
-        max_attempts = 30
-        attempt = 0
-        while not os.path.exists(inventory_path) and attempt < max_attempts:
-            time.sleep(1)
-            attempt += 1
+        try:
+            with TRACER.span('inventory wait'):
+                inventory = wait_for_inventory(inventory_path, [f"clab-{lab_name}-{device}" for device in configure])
+        except TimeoutError as e:
+            inventory = None
+            print(f"Inventory file not ready: {e}")
         
-        if os.path.exists(inventory_path):
+        if inventory is not None:
             # Inventory dosyasını zenginleştir
             print(f"Inventory file found: {inventory_path}")
-            time.sleep(2)  # Dosyanın tamamen yazılmasını bekle
-            enrich_inventory(inventory_path)
+            with TRACER.span('enrich inventory'):
+                enrich_inventory(inventory_path, inventory)
             print("Inventory file enriched")
             
-            # Loopback playbook'u oluştur
-            create_loopback_playbooks()
-            print("Loopback playbooks created")
-            
-            # Interface IP playbook'u oluştur
-            create_interface_ip_playbooks()
-            print("Interface IP playbooks created")
-            
-            # Save config playbook'u oluştur
-            create_save_config_playbooks()
-            print("Save config playbook created")
-            
-            # Network yapılandırma değişkenlerini oluştur
-            create_network_vars(connections, lab_name)
-            print("Network configuration variables created")
+            # Yapılandırma push playbook'unu oluştur
+            create_push_config_playbook()
+            create_save_config_playbook()
+            print("Push and save playbooks created")
+            if boot_configured:
+                create_verify_config_playbook()
             
-            # VIOS cihazları var mı kontrol et
-            has_vios = False
-            with open(inventory_path, 'r') as f:
-                inv = yaml.safe_load(f)
-                if 'cisco_vios' in inv['all']['children'] and 'hosts' in inv['all']['children']['cisco_vios']:
-                    has_vios = True
+            # Network yapılandırma değişkenlerini yaz
+            with TRACER.span('host_vars'):
+                changed = write_host_vars(device_configs, lab_name)
+            print_link_summary(links)
+            print(f"Network configuration variables created ({changed}/{len(device_configs)} files changed)")
             
-            # Cihazların hazır olmasını bekle
-            print("Waiting for devices to be ready...")
+            # Hazırlık kontrolü hedeflerini oluştur - sadece yapılandırılacak cihazlar
+            targets = []
+            for target in get_probe_targets(topology):
+                if target['device'] not in configure:
+                    continue
+                # Journal'da tamamlanan aşamalar atlanır, hepsi tamamlanmış cihaz hiç beklenmez
+                target['stages'], unsaved = journal.remaining(target['device'], state['configs'].get(target['device']))
+                if target['stages'] or unsaved:
+                    targets.append(target)
+            if resume:
+                print(f"{len(configure) - len(targets)}/{len(configure)} devices already completed")
+            attach_config_lines(targets, device_configs)
+            for target in targets:
+                # Artık kullanılmayan interface'lerden eski adresleri kaldır
+                for interface in changes['removed_interfaces'].get(target['device'], []):
+                    target['config_lines'] = [f'interface {interface}', 'no ip address'] + target['config_lines']
             
-            # IOL cihazları için bekleme
-            max_attempts = 20
-            for attempt in range(max_attempts):
-                try:
-                    # SSH bağlantısını test et - IOL cihazları için
-                    result_iol = subprocess.run(
-                        ['ansible', 'cisco_iol', '-i', inventory_path, '-m', 'ping'],
-                        capture_output=True,
-                        text=True
-                    )
-                    
-                    if result_iol.returncode == 0:
-                        print("IOL devices ready!")
-                        break
-                    
-                    print(f"Attempt {attempt + 1}/{max_attempts}... IOL devices not ready yet.")
-                    time.sleep(10)
-                except Exception as e:
-                    print(f"Error during ping: {e}")
-                    time.sleep(10)
-            
-            # Loopback yapılandırmasını uygula - Sadece IOL cihazları için
-            print("\nApplying Loopback configuration for IOL devices...")
+            # Her cihaz hazır olur olmaz yapılandırılır, global aşama bariyeri yok
+            print("Waiting for devices to be ready and configuring them as they come up...")
+            print("-" * 50)
+            backend = create_transport(transport, inventory_path)
+            with TRACER.span('pipeline', devices=len(targets)):
+                results = run_pipeline(targets, backend, inventory_path, deployed_at, budget, journal, workers)
             print("-" * 50)
-            result = subprocess.run(
-                ['ansible-playbook', '-i', inventory_path, 'loopback_iol.yaml'],
-                capture_output=True,
-                text=True,
-                env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-            )
-            if result.returncode == 0:
-                # Sadece yapılandırma özetini göster
-                for line in result.stdout.split('\n'):
-                    if "Loopback Configuration" in line:
-                        print(line.replace('\\n', '\n').replace('msg:', '').strip())
-                print("-" * 50)
-                print("Loopback configuration for IOL devices successfully completed")
-            else:
-                print("Error during Loopback configuration:")
-                print(result.stderr)
-                
-            # Interface IP'lerini yapılandır - Sadece IOL cihazları için
-            print("\nConfiguring Interface IPs for IOL devices...")
-            result = subprocess.run(
-                ['ansible-playbook', '-i', inventory_path, 'interface_ip_iol.yaml'],
-                capture_output=True,
-                text=True,
-                env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-            )
             
-            # Interface IP çıktılarını işle
-            if result.returncode == 0:
-                print("\nInterface IP configuration for IOL devices successfully completed")
-                
-                # Konfigürasyonu kaydet - Sadece IOL cihazları için
-                print("\nSaving configurations for IOL devices...")
-                save_iol_config(lab_name, inventory_path)
-            else:
-                print("\nError during Interface IP configuration:")
-                print(result.stderr)
+            configured = sum(1 for result in results.values() if not result['error'])
+            print(f"{configured}/{len(targets)} devices configured and saved")
+            print_retry_outcomes(results)
+            print_manual_commands(inventory_path, targets, results)
             
-            # VIOS cihazları için bekleme ve yapılandırma
-            if has_vios:
-                print("\n" + "=" * 80)
-                print("Waiting for VIOS devices to start (3 minutes)...")
-                print("=" * 80)
-                
-                # 3 dakika bekle
-                time.sleep(180)
-                
-                # VIOS cihazlarının hazır olup olmadığını kontrol et
-                try:
-                    result_vios = subprocess.run(
-                        ['ansible', 'cisco_vios', '-i', inventory_path, '-m', 'ping'],
-                        capture_output=True,
-                        text=True
-                    )
-                    
-                    if result_vios.returncode == 0:
-                        print("VIOS devices ready!")
-                        
-                        # Loopback yapılandırmasını uygula - VIOS cihazları için
-                        print("\nApplying Loopback configuration for VIOS devices...")
-                        print("-" * 50)
-                        result = subprocess.run(
-                            ['ansible-playbook', '-i', inventory_path, 'loopback_vios.yaml'],
-                            capture_output=True,
-                            text=True,
-                            env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-                        )
-                        if result.returncode == 0:
-                            # Sadece yapılandırma özetini göster
-                            for line in result.stdout.split('\n'):
-                                if "Loopback Configuration" in line:
-                                    print(line.replace('\\n', '\n').replace('msg:', '').strip())
-                            print("-" * 50)
-                            print("Loopback configuration for VIOS devices successfully completed")
-                        else:
-                            print("Error during VIOS Loopback configuration:")
-                            print(result.stderr)
-                            
-                        # Interface IP'lerini yapılandır - VIOS cihazları için
-                        print("\nConfiguring Interface IPs for VIOS devices...")
-                        result = subprocess.run(
-                            ['ansible-playbook', '-i', inventory_path, 'interface_ip_vios.yaml'],
-                            capture_output=True,
-                            text=True,
-                            env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-                        )
-                        
-                        # Interface IP çıktılarını işle
-                        if result.returncode == 0:
-                            print("\nInterface IP configuration for VIOS devices successfully completed")
-                            
-                            # Konfigürasyonu kaydet - VIOS cihazları için
-                            print("\nSaving configurations for VIOS devices...")
-                            result = subprocess.run(
-                                ['ansible-playbook', '-i', inventory_path, 'save_config.yaml', '--limit', 'cisco_vios'],
-                                capture_output=True,
-                                text=True,
-                                env=dict(os.environ, ANSIBLE_DISPLAY_SKIPPED_HOSTS='false')
-                            )
-                            if result.returncode == 0:
-                                print("VIOS configurations successfully saved")
-                            else:
-                                print("Error during VIOS configuration save:")
-                                print(result.stderr)
-                        else:
-                            print("\nError during VIOS Interface IP configuration:")
-                            print(result.stderr)
+            # Sıfırdan ve tamamen başarılı yapılandırılan lab'ın config'lerini bir sonraki deploy için sakla
+            if (cache is not None and snapshot is None and old_state is None and not resume
+                    and configured == len(targets)):
+                if transport == 'ansible':
+                    create_collect_config_playbook()
+                with TRACER.span('snapshot'):
+                    collect_snapshot(cache, backend, targets, yaml_content, allocator, lab_name)
+            
+            # Başarısız cihazların eski yapılandırma özetini koru, bir sonraki --diff bunları tekrar dener
+            for device, result in results.items():
+                if result['error']:
+                    previous = old_state['configs'].get(device) if old_state else None
+                    if previous is None:
+                        state['configs'].pop(device, None)
                     else:
-                        print("VIOS devices still not ready after 3 minutes. You may need to configure them manually.")
-                        print("\nManual configuration commands:")
-                        print(f"ansible-playbook -i {inventory_path} loopback_vios.yaml")
-                        print(f"ansible-playbook -i {inventory_path} interface_ip_vios.yaml")
-                        print(f"ansible-playbook -i {inventory_path} save_config.yaml --limit cisco_vios")
-                except Exception as e:
-                    print(f"Error during VIOS ping: {e}")
-                    print("You may need to configure them manually.")
-                    print("\nManual configuration commands:")
-                    print(f"ansible-playbook -i {inventory_path} loopback_vios.yaml")
-                    print(f"ansible-playbook -i {inventory_path} interface_ip_vios.yaml")
-                    print(f"ansible-playbook -i {inventory_path} save_config.yaml --limit cisco_vios")
-        else:
-            print("Inventory file not found")
+                        state['configs'][device] = previous
+                    state['interfaces'][device] = sorted(
+                        set(state['interfaces'].get(device, [])) |
+                        set(old_state['interfaces'].get(device, []) if old_state else []))
+            state['topology_hash'] = content_hash([state['nodes'], state['links'], state['configs']])
+            save_state(lab_name, state)
+            return results
     except subprocess.CalledProcessError as e:
         print(f"Error deploying lab: {e}")
     except Exception as e:
         print(f"Unexpected error: {e}")
 
-def create_ansible_cfg():
-    config = """[defaults]
+def batch_inputs(paths):
+    # Dizinlerdeki *.txt ve *.txt.gz topoloji dosyalarını, dosyaları olduğu gibi al
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '*.txt')) + glob.glob(os.path.join(path, '*.txt.gz')))
+        else:
+            files.append(path)
+    return files
+
+def lab_artifacts(lab_name):
+    # Bir lab'a özel üretilen dosya ve dizinler
+    return [f"{lab_name}.yaml", f"clab-{lab_name}", state_path(lab_name), manifest_path(lab_name),
+            f"clab-{lab_name}.log", f"clab-{lab_name}.traces", os.path.join(VIOS_CONFIG_DIR, lab_name)]
+
+def check_batch_collisions(topologies):
+    """Lab adı ve üretilen dosya yolu çakışmalarını listeler (yönetim adreslerini MgmtPlanner ayırır)"""
+    errors = []
+    owners = {path: 'shared artifact' for path in SHARED_ARTIFACTS}
+    names = {}
+    for filename, topology in topologies:
+        other = names.setdefault(topology.name, filename)
+        if other != filename:
+            errors.append(f"{filename}: lab name {topology.name} is already used by {other}")
+            continue
+        for path in lab_artifacts(topology.name):
+            owner = owners.setdefault(path, f"lab {topology.name} ({filename})")
+            if owner != f"lab {topology.name} ({filename})":
+                errors.append(f"{filename}: {path} is already used by {owner}")
+    return errors
+
+def deploy_batch_lab(topology, args, budget, share, cache=None):
+    """Batch modunda tek lab'ı kendi thread'inde, çıktısı kendi log dosyasına giderek deploy eder"""
+    lab_name = topology.name
+    started = time.monotonic()
+    TRACER.process(lab_name)
+    with open(f"clab-{lab_name}.log", 'w', buffering=1) as log:
+        sys.stdout.local.file = log
+        try:
+            allocator = IPAllocator(args.p2p_supernet, args.p2p_prefix, args.lan_supernet, args.lan_prefix)
+            output_filename = f"{lab_name}.yaml"
+            config_dir = os.path.join(VIOS_CONFIG_DIR, lab_name)
+            with TRACER.span('yaml'):
+                yaml_dict = create_yaml_structure(topology, config_dir, args.day0)
+                snapshot = None if args.resume else find_snapshot(cache, yaml_dict, allocator, lab_name, args.diff)
+                if snapshot is not None and not args.day0:
+                    # IOL node'ları da startup-config dosyasını yüklemeli
+                    yaml_dict = create_yaml_structure(topology, config_dir, day0=True)
+                # Eşzamanlı lab'lar host kapasitesini paylaşır
+                boot_workers = None if args.no_stagger else admit_boot(topology, yaml_dict, share)
+                write_yaml_file(yaml_dict, output_filename)
+            with TRACER.span('deploy'):
+                results = deploy_lab(output_filename, topology, yaml_dict, transport=args.transport,
+                                     allocator=allocator, incremental=args.diff, budget=budget,
+                                     boot_workers=boot_workers, day0=args.day0, cache=cache, snapshot=snapshot,
+                                     resume=args.resume, workers=args.workers)
+            write_manifest(lab_name)
+            TRACER.print_summary()
+        finally:
+            del sys.stdout.local.file
+    return {'results': results, 'duration': time.monotonic() - started}
+
+def print_batch_report(reports):
+    # Lab bazlı sonuç tablosu
+    width = max([len('Lab')] + [len(lab_name) for lab_name in reports])
+    print(f"\n{'Lab':<{width}}  {'Status':<10} {'Devices':>9} {'Time':>8}  Log")
+    for lab_name, report in reports.items():
+        results = report['results']
+        if results is None:
+            status, devices = 'failed', '-'
+        else:
+            configured = sum(1 for result in results.values() if not result['error'])
+            status = 'ok' if configured == len(results) else 'partial'
+            devices = f"{configured}/{len(results)}"
+        print(f"{lab_name:<{width}}  {status:<10} {devices:>9} {report['duration']:>7.1f}s  clab-{lab_name}.log")
+
+def run_batch(paths, args, parser, cache=None):
+    """Birden fazla lab'ı ortak bir yapılandırma slot bütçesiyle eşzamanlı deploy eder"""
+    files = batch_inputs(paths)
+    if not files:
+        parser.exit(1, "No topology files found\n")
+    topologies = []
+    errors = []
+    # Lab'lar aynı yönetim ağını paylaşır, adresler tek indeksten dosya sırasıyla ayrılır
+    planner = MgmtPlanner(args.mgmt_subnet, args.mgmt_network)
+    for filename in files:
+        try:
+            lab_name, connections = parse_input_file(filename)
+            topologies.append((filename, build_topology(lab_name, connections, planner,
+                                                        previous_mgmt(lab_name, args.diff, args.resume))))
+        except (OSError, TopologyError) as e:
+            errors.append(f"Error reading topology: {e}")
+        except ValueError as e:
+            errors.append(f"{filename}: error planning management addresses: {e}")
+    errors += check_batch_collisions(topologies)
+    if errors:
+        parser.exit(1, '\n'.join(errors) + '\n')
+    
+    # Tüm lab'lar aynı ansible.cfg'yi kullanır, profil toplam node sayısına göre seçilir
+    create_ansible_cfg(resolve_ansible_profile(
+        itertools.chain.from_iterable(topology.nodes.values() for _, topology in topologies)))
+    create_push_config_playbook()
+    create_save_config_playbook()
+    if args.day0:
+        create_verify_config_playbook()
+    batch_workers = args.batch_workers or BATCH_WORKERS
+    budget = WorkerBudget(batch_workers)
+    jobs = min(args.batch_jobs or len(topologies), len(topologies))
+    print(f"Deploying {len(topologies)} labs ({jobs} at a time, {batch_workers} configuration workers)")
+    reports = {}
+    sys.stdout = LabOutput(sys.stdout)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(deploy_batch_lab, topology, args, budget, 1 / jobs, cache): topology.name
+                       for _, topology in topologies}
+            for future in concurrent.futures.as_completed(futures):
+                lab_name = futures[future]
+                try:
+                    reports[lab_name] = future.result()
+                except Exception as e:
+                    reports[lab_name] = {'results': None, 'duration': 0.0}
+                    print(f"{lab_name}: unexpected error: {e}")
+                print(f"{lab_name} finished")
+    finally:
+        sys.stdout = sys.stdout.default
+    print_batch_report({topology.name: reports[topology.name] for _, topology in topologies})
+    return reports
+
+def bench_router(index):
+    # Router'lar IOL ve VIOS arasında dönüşümlü adlandırılır
+    return f"r{index // 2 + 1}" if index % 2 == 0 else f"vr{index // 2 + 1}"
+
+def bench_switch(index):
+    return f"s{index // 2 + 1}" if index % 2 == 0 else f"vs{index // 2 + 1}"
+
+def bench_access(routers, per_switch=2):
+    # Her switch'e birkaç router bağla (LAN başına host sınırının altında)
+    return [(bench_switch(i // per_switch), router) for i, router in enumerate(routers)]
+
+def bench_links(pairs):
+    """Cihaz çiftlerine port atar; port 0 yönetim arayüzü olduğu için 1'den başlar"""
+    ports = collections.Counter()
+    def next_port(device):
+        ports[device] += 1
+        number = ports[device]
+        # VIOS sadece e0/<N>, IOL e<slot>/<port> biçimini kabul eder
+        if NODE_KINDS.of(device)['vios']:
+            return f"e0/{number}"
+        return f"e{number // 4}/{number % 4}"
+    return [(a, next_port(a), b, next_port(b)) for a, b in pairs]
+
+def bench_ring(size):
+    count = max(3, size // 2)
+    routers = [bench_router(i) for i in range(count)]
+    ring = [(routers[i], routers[(i + 1) % count]) for i in range(count)]
+    return ring + bench_access(routers)
+
+def bench_full_mesh(size):
+    count = 3
+    while (count + 1) * count // 2 + count + 1 <= size:
+        count += 1
+    routers = [bench_router(i) for i in range(count)]
+    return list(itertools.combinations(routers, 2)) + bench_access(routers)
+
+def bench_hub_spoke(size):
+    spokes = max(2, size // 2)
+    hubs = max(1, spokes // 500)
+    routers = [bench_router(i) for i in range(hubs + spokes)]
+    spoke_routers = routers[hubs:]
+    return [(routers[i % hubs], spoke) for i, spoke in enumerate(spoke_routers)] + bench_access(spoke_routers)
+
+def bench_leaf_spine(size):
+    spine_count = max(2, int(size ** 0.5) // 4)
+    leaf_count = max(2, size // (spine_count + 1))
+    routers = [bench_router(i) for i in range(spine_count + leaf_count)]
+    spines, leaves = routers[:spine_count], routers[spine_count:]
+    return [(leaf, spine) for leaf in leaves for spine in spines] + bench_access(leaves)
+
+def bench_fat_tree(size):
+    # k-ary fat-tree: k^3/2 router bağlantısı + her edge router için bir erişim bağlantısı
+    k = 2
+    while ((k + 2) ** 3 + (k + 2) ** 2) // 2 <= size:
+        k += 2
+    half = k // 2
+    index = itertools.count()
+    cores = [bench_router(next(index)) for _ in range(half * half)]
+    pairs, edges = [], []
+    for _ in range(k):
+        aggs = [bench_router(next(index)) for _ in range(half)]
+        pod_edges = [bench_router(next(index)) for _ in range(half)]
+        pairs += [(edge, agg) for edge in pod_edges for agg in aggs]
+        pairs += [(agg, cores[j * half + c]) for j, agg in enumerate(aggs) for c in range(half)]
+        edges += pod_edges
+    return pairs + bench_access(edges)
+
+BENCH_GENERATORS = {
+    'ring': bench_ring,
+    'full-mesh': bench_full_mesh,
+    'hub-spoke': bench_hub_spoke,
+    'leaf-spine': bench_leaf_spine,
+    'fat-tree': bench_fat_tree,
+}
+
+def write_bench_input(topology, size, directory):
+    """Sentetik topolojiyi input.txt biçiminde yazar, (dosya yolu, bağlantı sayısı) döndürür"""
+    links = bench_links(BENCH_GENERATORS[topology](size))
+    path = os.path.join(directory, f"bench-{topology}-{size}.txt")
+    with open(path, 'w') as file:
+        file.write(f"name: bench-{topology}-{size}\n")
+        file.writelines('\t'.join(link) + '\n' for link in links)
+    return path, len(links)
+
+def bench_stages(input_file):
+    # Her aşama bir öncekinin çıktısını kullanır; dosyalar bellekte üretilir, diske sadece write aşaması yazar
+    state = {}
+    def parse():
+        state['topology'] = build_topology(*parse_input_file(input_file), MgmtPlanner(BENCH_MGMT_SUBNET))
+    def structure():
+        topology = state['topology']
+        state['files'] = {f"{topology.name}.yaml": dump_yaml(create_yaml_structure(topology), sort_keys=False)}
+    def network_vars():
+        topology = state['topology']
+        device_configs, links = plan_network(topology, IPAllocator(*BENCH_POOLS))
+        state['files'].update((host_vars_path(topology.name, device), dump_yaml(config))
+                              for device, config in device_configs.items())
+        print_link_summary(links)
+    def write():
+        for path, content in state['files'].items():
+            write_artifact(path, content)
+    return list(zip(BENCH_STAGES, (parse, structure, network_vars, write)))
+
+def bench_reference():
+    # Kodumuzdan bağımsız sabit iş (dict, str, sıralama); makinenin o anki hızını ölçer
+    gc.collect()
+    start = time.process_time()
+    items = {f"r{i}": (i, str(i * 7919)) for i in range(BENCH_REFERENCE_ITEMS)}
+    sorted(items, key=lambda key: items[key][1])
+    return time.process_time() - start
+
+def run_bench_case(input_file, mode):
+    """Aşamaları boş bir çalışma dizininde bir kez çalıştırır; mode: time, memory veya profile"""
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, 'w') as devnull:
+        os.chdir(workdir)
+        try:
+            # Bağlantı özetini ekrana basma
+            with contextlib.redirect_stdout(devnull):
+                for name, stage in bench_stages(input_file):
+                    if mode == 'memory':
+                        # Aşama başına sıfırdan başlat, tepe değer sadece o aşamanın ayırdığı bellektir
+                        tracemalloc.start()
+                        stage()
+                        results[name] = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                    elif mode == 'profile':
+                        profile = cProfile.Profile()
+                        profile.runcall(stage)
+                        stream = io.StringIO()
+                        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(BENCH_PROFILE_LINES)
+                        results[name] = stream.getvalue()
+                    else:
+                        # Diğer süreçler sayılmasın diye CPU süresi ölçülür; yazma aşamasında disk beklemesi de
+                        # sürenin parçası olduğundan duvar saati kullanılır
+                        clock = time.perf_counter if name in BENCH_IO_STAGES else time.process_time
+                        reference = bench_reference()
+                        gc.collect()
+                        start = clock()
+                        stage()
+                        results[name] = (clock() - start, reference)
+        finally:
+            os.chdir(cwd)
+            artifact_manifest().clear()
+    return results
+
+def bench_spread(samples):
+    # Medyandan mutlak sapmaların medyanı: tek tük yavaş tekrarlardan etkilenmez
+    middle = statistics.median(samples)
+    return statistics.median(abs(sample - middle) for sample in samples)
+
+def bench_stage_result(samples, peak_bytes):
+    # samples: (aşama süresi, referans süresi) çiftleri
+    relative = [seconds / reference for seconds, reference in samples]
+    return {'seconds': statistics.median(seconds for seconds, _ in samples),
+            'reference': statistics.median(reference for _, reference in samples),
+            'relative': statistics.median(relative), 'spread': bench_spread(relative), 'peak_bytes': peak_bytes}
+
+def run_benchmark(topologies, sizes, repeat=BENCH_REPEAT, profile=False):
+    """Her topoloji ve boyut için aşamaların CPU süresini, referans işe oranını ve tepe belleği ölçer"""
+    for prefix, pools in BENCH_LOOPBACKS.items():
+        NODE_KINDS.register(prefix, base=prefix, loopbacks=pools)
+    results = {}
+    print(f"{'case':<20} {'links':>7} " + ' '.join(f"{stage:>12}" for stage in BENCH_STAGES) + f" {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as inputs:
+        for topology in topologies:
+            for size in sizes:
+                input_file, link_count = write_bench_input(topology, size, inputs)
+                timings = [run_bench_case(input_file, 'time') for _ in range(repeat)]
+                peaks = run_bench_case(input_file, 'memory')
+                case = f"{topology}/{size}"
+                results[case] = {
+                    'links': link_count,
+                    'stages': {stage: bench_stage_result([timing[stage] for timing in timings], peaks[stage])
+                               for stage in BENCH_STAGES},
+                }
+                stages = results[case]['stages']
+                print(f"{case:<20} {link_count:>7} " +
+                      ' '.join(f"{stages[stage]['seconds']:>11.4f}s" for stage in BENCH_STAGES) +
+                      f" {max(values['peak_bytes'] for values in stages.values()) / 2 ** 20:>9.1f}")
+                if profile:
+                    for stage, report in run_bench_case(input_file, 'profile').items():
+                        print(f"\n--- {case} {stage} ---")
+                        print(report.strip())
+                    print()
+    return results
+
+def load_benchmark(path):
+    with open(path, 'r') as file:
+        baseline = json.load(file)
+    if baseline.get('version') != BENCH_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark version {baseline.get('version')!r}")
+    return baseline
+
+def save_benchmark(path, results):
+    write_artifact(path, json.dumps({'version': BENCH_VERSION, 'python': platform.python_version(),
+                                     'results': results}, indent=1, sort_keys=True) + '\n')
+
+def compare_benchmark(results, baseline, threshold=BENCH_THRESHOLD):
+    """Baseline'a göre eşik ve gürültü payını aşan süre/bellek artışlarını listeler"""
+    regressions = []
+    compared = 0
+    for case, result in results.items():
+        previous = baseline['results'].get(case)
+        if previous is None or previous['links'] != result['links']:
+            continue
+        compared += 1
+        for stage, values in result['stages'].items():
+            before = previous['stages'].get(stage)
+            if before is None:
+                continue
+            # Süreler referans işe oranlanmış değerlerle karşılaştırılır; gürültü payı iki ölçümden
+            # yayılımı büyük olanla ölçeklenir, taban değer baseline makinesinin hızıyla orana çevrilir
+            noise = max(BENCH_NOISE_SECONDS / before['reference'],
+                        BENCH_NOISE_SPREAD * max(before['spread'], values['spread']))
+            for metric, compared_metric, noise in (('seconds', 'relative', noise),
+                                                   ('peak_bytes', 'peak_bytes', BENCH_NOISE_BYTES)):
+                if metric == 'seconds' and stage in BENCH_IO_STAGES:
+                    continue
+                old, new = before[compared_metric], values[compared_metric]
+                if new > old * threshold and new - old > noise:
+                    ratio = f"x{new / old:.2f}" if old else "new"
+                    regressions.append(f"{case} {stage} {metric}: {before[metric]:.4g} -> {values[metric]:.4g} "
+                                       f"({ratio})")
+    return compared, regressions
+
+def bench_list(choices=None, convert=str):
+    # Virgülle ayrılmış argparse listesi
+    def parse(value):
+        items = []
+        for item in value.split(','):
+            try:
+                item = convert(item.strip())
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"invalid value {item!r}")
+            if choices is not None and item not in choices:
+                raise argparse.ArgumentTypeError(f"invalid choice {item!r} (choose from {', '.join(choices)})")
+            items.append(item)
+        return items
+    return parse
+
+class SimResource:
+    """Sanal saatte kapasiteli kaynak, bekleyenler sırayla alır"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.used = 0
+        self.waiters = collections.deque()
+
+class SimEvent:
+    """Bir kez tetiklenen ve bekleyen süreçleri uyandıran olay"""
+    def __init__(self):
+        self.fired = False
+        self.waiters = []
+
+class Simulation:
+    """heapq tabanlı ayrık olay simülasyonu; süreçler süre, SimResource ya da SimEvent yield eden generator'lar"""
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []
+        self.sequence = itertools.count()
+
+    def start(self, process, delay=0.0):
+        heapq.heappush(self.queue, (self.now + delay, next(self.sequence), process))
+
+    def release(self, resource):
+        if resource.waiters:
+            # Kaynak doğrudan sıradaki bekleyene geçer
+            self.start(resource.waiters.popleft())
+        else:
+            resource.used -= 1
+
+    def fire(self, event):
+        event.fired = True
+        for process in event.waiters:
+            self.start(process)
+        event.waiters.clear()
+
+    def run(self):
+        while self.queue:
+            self.now, _, process = heapq.heappop(self.queue)
+            try:
+                request = next(process)
+            except StopIteration:
+                continue
+            if isinstance(request, SimResource):
+                if request.used < request.capacity:
+                    request.used += 1
+                    self.start(process)
+                else:
+                    request.waiters.append(process)
+            elif isinstance(request, SimEvent):
+                if request.fired:
+                    self.start(process)
+                else:
+                    request.waiters.append(process)
+            else:
+                self.start(process, request)
+        return self.now
+
+def sim_latency(latencies, node):
+    # Image'a özel dağılım varsa onu, yoksa grubun dağılımını kullan
+    return latencies.get(node.kind['image']) or latencies[node.group]
+
+def sample_boot_times(topology, latencies, seed):
+    # Aynı tohumla her ayar aynı açılış sürelerini görür, ayarlar adil karşılaştırılır
+    rng = random.Random(seed)
+    samples = {}
+    for node in topology.nodes.values():
+        median, sigma = sim_latency(latencies, node)['boot']
+        samples[node.name] = rng.lognormvariate(math.log(median), sigma)
+    return samples
+
+def simulate_deploy(topology, config_sizes, setting, boot_times, latencies, cpus, seed):
+    """deploy_lab'ın aşamalarını sanal saatte oynatır: açılış dalgaları, inventory, hazırlık, config, save"""
+    sim = Simulation()
+    rng = random.Random(seed)
+    nodes = list(topology.nodes.values())
+    overhead = SIM_TRANSPORT_OVERHEAD[setting['transport']]
+    if setting.get('waves'):
+        waves = setting['waves']
+    elif setting['stagger']:
+        waves = plan_boot_waves(topology, {'cpus': cpus, 'load': 0.0, 'memory': 0})
+    else:
+        waves = [[node.name for node in nodes]]
+    create_slots = SimResource(max(map(len, waves)))
+    prompt_slots = SimResource(PROMPT_CHECK_CONCURRENCY)
+    workers = SimResource(setting['workers'])
+    # _run_pipeline ile aynı sınırlar: aşama semaphore'ları ve batch modunda lab'lar arası bütçe
+    stage_slots = {stage: SimResource(limit) for stage, limit in STAGE_CONCURRENCY.items()}
+    budget = SimResource(setting['budget']) if setting.get('budget') else None
+    booted = {node.name: SimEvent() for node in nodes}
+    deployed = SimEvent()
+    timeline = {node.name: {} for node in nodes}
+    phases = {}
+    state = {'cpu': 0.0, 'created': 0, 'pending': len(nodes)}
+
+    def inventory():
+        phases['containerlab deploy'] = sim.now
+        yield SIM_INVENTORY_TIME
+        phases['inventory wait'] = sim.now
+        sim.fire(deployed)
+
+    def create(node, previous):
+        times = timeline[node.name]
+        # containerlab stages: önceki dalganın tüm node'ları healthy olana kadar bekle
+        for name in previous:
+            yield booted[name]
+        yield create_slots
+        times['create'] = sim.now
+        yield SIM_CREATE_TIME
+        sim.release(create_slots)
+        state['created'] += 1
+        if state['created'] == len(nodes):
+            sim.start(inventory())
+        # Aynı anda açılan node'lar host çekirdeklerini aşarsa açılış uzar
+        cost = node.kind
+        stretch = max(1.0, (state['cpu'] + cost['boot_cpu']) / cpus)
+        state['cpu'] += cost['boot_cpu']
+        times['boot'] = sim.now
+        yield boot_times[node.name] * stretch
+        state['cpu'] += cost['idle_cpu'] - cost['boot_cpu']
+        times['booted'] = sim.now
+        sim.fire(booted[node.name])
+
+    def device(node):
+        times = timeline[node.name]
+        latency = sim_latency(latencies, node)
+        profile = READINESS_PROFILES[node.group]
+        yield deployed
+        started = sim.now
+        attempt = 0
+        # wait_for_device: açılmamış cihazda yoklama başarısız olur, jitter'lı üstel backoff ile tekrar
+        while not booted[node.name].fired:
+            if sim.now - started > profile['deadline']:
+                times['error'] = 'not ready'
+                break
+            yield SIM_PROBE_FAIL_TIME
+            delay = min(profile['backoff_max'], profile['backoff_base'] * 2 ** attempt)
+            attempt += 1
+            yield rng.uniform(delay / 2, delay)
+        if 'error' not in times:
+            yield prompt_slots
+            yield latency['session']
+            sim.release(prompt_slots)
+            times['ready'] = sim.now
+            for stage in DAY0_STAGES if setting['day0'] else PIPELINE_STAGES:
+                # configure_device: async with workers, budget, stage_slots[stage]
+                yield workers
+                if budget is not None:
+                    yield budget
+                yield stage_slots[stage]
+                times.setdefault('queued', sim.now)
+                if stage == 'verify':
+                    # Sadece running config okunur
+                    yield overhead + latency['session'] + 2 * latency['command']
+                else:
+                    yield overhead + latency['session'] + config_sizes[node.name] * latency['command']
+                sim.release(stage_slots[stage])
+                if budget is not None:
+                    sim.release(budget)
+                sim.release(workers)
+            times['configured'] = sim.now
+        times['done'] = sim.now
+        state['pending'] -= 1
+        if state['pending'] == 0:
+            sim.start(save_stage())
+
+    def save_device(node, slots, done):
+        latency = sim_latency(latencies, node)
+        yield slots
+        # Running/startup karşılaştırması; day-0'da cihazlar zaten kayıtlı
+        yield latency['session'] + 2 * latency['command'] + (0 if setting['day0'] else latency['save'])
+        sim.release(slots)
+        timeline[node.name]['saved'] = sim.now
+        done['pending'] -= 1
+        if done['pending'] == 0:
+            phases['save'] = sim.now
+
+    def save_stage():
+        # _run_pipeline: tüm hazır cihazlar tek save çalıştırmasında
+        phases['configure'] = sim.now
+        ready = [node for node in nodes if 'configured' in timeline[node.name]]
+        if not ready:
+            phases['save'] = sim.now
+            return
+        yield overhead
+        if setting['transport'] == 'ansible':
+            slots = SimResource(tune_ansible_profile(nodes, cpus)['forks'])
+        else:
+            slots = SimResource(PIPELINE_WORKERS)
+        done = {'pending': len(ready)}
+        for node in ready:
+            sim.start(save_device(node, slots, done))
+
+    previous = []
+    for wave in waves:
+        for name in wave:
+            sim.start(create(topology.nodes[name], previous))
+        previous = wave
+    for node in nodes:
+        sim.start(device(node))
+    sim.run()
+    # Hazır olmayan cihazların açılışı save'den sonra da sürebilir, deploy save ile biter; deadline'ı kaçıran
+    # cihaz erken biter, bu yüzden süre ancak başarısız cihaz sayısıyla birlikte karşılaştırılabilir
+    failed = [name for name, times in timeline.items() if 'error' in times]
+    return {'makespan': phases['save'], 'failed': failed, 'timeline': timeline, 'phases': phases}
+
+def sim_critical_path(result):
+    """Save aşamasını en son bekleten cihazın adımlarını (ad, süre) listesi olarak döndürür"""
+    timeline = result['timeline']
+    device = max(timeline, key=lambda name: timeline[name].get('done', 0.0), default=None)
+    if device is None:
+        return None, []
+    times = timeline[device]
+    if 'error' in times:
+        # Deadline'a kadar hazır olmayan cihaz save'i bekletir
+        steps = [('wait create', times.get('create')), ('create', times.get('boot')),
+                 ('inventory', result['phases']['inventory wait']), ('not ready', times['done'])]
+    else:
+        steps = [('wait create', times['create']), ('create', times['boot']), ('boot', times['booted']),
+                 ('inventory', max(times['booted'], result['phases']['inventory wait'])), ('ready', times['ready']),
+                 ('queue', times['queued']), ('config', times['configured'])]
+    steps.append(('save', result['phases']['save']))
+    path = []
+    previous = 0.0
+    for name, end in steps:
+        if end is None:
+            continue
+        path.append((name, max(0.0, end - previous)))
+        previous = max(previous, end)
+    return device, path
+
+def run_simulation(topology, allocator, workers, runs=SIM_RUNS, cpus=None, transport='ansible', day0=False,
+                   latencies=None, budget=None):
+    """Farklı eşzamanlılık ayarlarının tahmini deploy süresini ve kritik yolunu raporlar"""
+    cpus = cpus or host_cpus()
+    latencies = latencies or SIM_LATENCIES
+    device_configs, _ = plan_network(topology, allocator)
+    config_sizes = {node.name: len(device_configs[node.name]['config_lines']) if node.name in device_configs else 0
+                    for node in topology.nodes.values()}
+    started = time.perf_counter()
+    boot_samples = [sample_boot_times(topology, latencies, SIM_SEED + run) for run in range(runs)]
+    print(f"Simulating {len(topology.nodes)} nodes, {runs} runs per setting, {cpus} CPUs, {transport} transport"
+          f"{', day-0 configs' if day0 else ''}{f', batch budget of {budget} workers' if budget else ''}")
+    print(f"{'workers':>7}  {'stagger':<7}  {'median(s)':>9}  {'p95(s)':>8}  {'failed':>6}  Critical device")
+    results = []
+    for worker_count, stagger in itertools.product(workers, (True, False)):
+        setting = {'workers': worker_count, 'stagger': stagger, 'transport': transport, 'day0': day0,
+                   'budget': budget}
+        runs_results = sorted((simulate_deploy(topology, config_sizes, setting, boot_times, latencies, cpus,
+                                               SIM_SEED + run)
+                               for run, boot_times in enumerate(boot_samples)),
+                              key=lambda result: (len(result['failed']), result['makespan']))
+        median = runs_results[len(runs_results) // 2]
+        makespans = sorted(result['makespan'] for result in runs_results)
+        p95 = makespans[min(len(makespans) - 1, int(len(makespans) * 0.95))]
+        device, path = sim_critical_path(median)
+        results.append((len(median['failed']), median['makespan'], setting, median))
+        print(f"{worker_count:>7}  {'yes' if stagger else 'no':<7}  {median['makespan']:>9.1f}  {p95:>8.1f}  "
+              f"{len(median['failed']):>6}  {device or '-'}")
+    # Daha az cihazı hazır edemeyen ayar, daha kısa sürse de tercih edilmez
+    failures, makespan, setting, median = min(results, key=lambda result: (result[0], result[1],
+                                                                             result[2]['workers']))
+    device, path = sim_critical_path(median)
+    print(f"\nBest: {setting['workers']} workers, {'staggered' if setting['stagger'] else 'all at once'}, "
+          f"predicted {makespan:.1f}s (deploy with --workers {setting['workers']}"
+          f"{'' if setting['stagger'] else ' --no-stagger'})")
+    for name in ('containerlab deploy', 'inventory wait', 'configure', 'save'):
+        print(f"  {name:<20} done at {median['phases'].get(name, 0.0):>8.1f}s")
+    if device is not None:
+        print(f"  critical path via {device}: " + ', '.join(f"{name} {seconds:.1f}s" for name, seconds in path
+                                                         if seconds >= 0.05))
+    if failures:
+        print(f"  every setting leaves devices not ready; {failures} not ready before the deadline: "
+              f"{', '.join(median['failed'])}")
+    print(f"Simulated {len(results) * runs} deploys in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return results
+
+def load_sim_latencies(path):
+    # JSON: {"<grup ya da image>": {"boot": [medyan, sigma], "command": .., "session": .., "save": ..}}
+    with open(path, 'r') as file:
+        overrides = json.load(file)
+    latencies = {key: dict(value) for key, value in SIM_LATENCIES.items()}
+    for key, value in overrides.items():
+        latencies[key] = dict(latencies.get(key, SIM_LATENCIES['cisco_iol']), **value)
+    return latencies
+
+def tune_ansible_profile(nodes, cpus=None):
+    """Node sayısı, cihaz tipleri ve çekirdek sayısından ansible.cfg ayarlarını seçer"""
+    nodes = list(nodes)
+    cpus = cpus or host_cpus()
+    groups = {node.group for node in nodes}
+    forks = max(ANSIBLE_MIN_FORKS, min(len(nodes), cpus * ANSIBLE_FORKS_PER_CPU, ANSIBLE_MAX_FORKS))
+    # Farklı hızdaki cihazlar veya fork'lardan fazla host varsa hızlı hostlar yavaşları beklemez
+    strategy = 'free' if len(groups) > 1 or len(nodes) > forks else 'linear'
+    connect_timeout = max([ANSIBLE_TIMEOUTS[group] for group in groups] or [ANSIBLE_TIMEOUTS['cisco_iol']])
+    # Çekirdek başına eşzamanlı oturum arttıkça komut yanıtları gecikir
+    command_timeout = connect_timeout + 10 * math.ceil(forks / cpus)
+    return {'forks': forks, 'strategy': strategy, 'timeout': connect_timeout,
+            'connect_timeout': connect_timeout, 'command_timeout': command_timeout}
+
+def resolve_ansible_profile(nodes):
+    """Deploy'da kullanılacak profili hesaplar ve ekrana yazar"""
+    profile = tune_ansible_profile(nodes)
+    print(f"Ansible profile: forks {profile['forks']}, strategy {profile['strategy']}, "
+          f"command timeout {profile['command_timeout']}s")
+    return profile
+
+def create_ansible_cfg(profile=None):
+    if profile is None:
+        profile = {'forks': ANSIBLE_MIN_FORKS, 'strategy': 'linear', 'timeout': 60,
+                   'connect_timeout': 60, 'command_timeout': 60}
+    config = f"""[defaults]
 connection = paramiko
 host_key_checking = False
-timeout = 60
+forks = {profile['forks']}
+strategy = {profile['strategy']}
+timeout = {profile['timeout']}
 deprecation_warnings = False
 interpreter_python = auto_silent
 [persistent_connection]
-command_timeout = 60
-connect_timeout = 60
+command_timeout = {profile['command_timeout']}
+connect_timeout = {profile['connect_timeout']}
 """
-    with open('ansible.cfg', 'w') as file:
-        file.write(config)
+    write_artifact('ansible.cfg', config)
 
 def main():
-    # Ansible config dosyasını oluştur
-    create_ansible_cfg()
-   
-    input_filename = 'input.txt'
-    # Input dosyasını parse et
-    lab_name, connections = parse_input_file(input_filename)
-    # Output dosya adını lab isminden oluştur
-    output_filename = f"{lab_name}.yaml"
-    # YAML yapısını oluştur
-    yaml_dict = create_yaml_structure(lab_name, connections)
-    # YAML dosyasını yaz
-    write_yaml_file(yaml_dict, output_filename)
-    print(f"YAML file successfully created: {output_filename}")
+    parser = argparse.ArgumentParser(description='Create, deploy and configure a Containerlab Cisco IOL/VIOS lab')
+    parser.add_argument('-i', '--input', default='input.txt', help='topology file (default: input.txt)')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='ansible',
+                        help='configuration backend: ansible-playbook or the in-process asyncio CLI driver')
+    parser.add_argument('--fake-lab', action='store_true',
+                        help='push the rendered configs to local fake IOS devices instead of deploying')
+    parser.add_argument('--diff', action='store_true',
+                        help='only redeploy and reconfigure nodes and links that changed since the last run')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run: skip the deploy and every device step already completed')
+    parser.add_argument('--p2p-supernet', default=P2P_SUPERNET, help=f'router-router pool (default: {P2P_SUPERNET})')
+    parser.add_argument('--p2p-prefix', type=int, default=P2P_PREFIX, help=f'router-router prefix length (default: {P2P_PREFIX})')
+    parser.add_argument('--lan-supernet', default=LAN_SUPERNET, help=f'switch LAN pool (default: {LAN_SUPERNET})')
+    parser.add_argument('--lan-prefix', type=int, default=LAN_PREFIX, help=f'switch LAN prefix length (default: {LAN_PREFIX})')
+    parser.add_argument('--day0', action='store_true',
+                        help='render the full config into each startup config so devices boot configured, '
+                             'then only verify it')
+    parser.add_argument('--mgmt-subnet', default=MGMT_SUBNET, metavar='PREFIX',
+                        help=f'IPv4 prefix node management addresses are allocated from (default: {MGMT_SUBNET})')
+    parser.add_argument('--mgmt-network', default=MGMT_NETWORK, metavar='NAME',
+                        help=f'containerlab management network name (default: {MGMT_NETWORK})')
+    parser.add_argument('--node-kinds', metavar='FILE',
+                        help='YAML file with extra node kinds (device name prefix -> image, group, addressing)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not boot from or store snapshots of the saved device configs')
+    parser.add_argument('--cache-dir', default=SNAPSHOT_DIR, help=f'snapshot cache directory (default: {SNAPSHOT_DIR})')
+    parser.add_argument('--cache-size', type=int, default=SNAPSHOT_CACHE_SIZE,
+                        help=f'snapshot cache size limit in MiB, least recently used snapshots are evicted '
+                             f'(default: {SNAPSHOT_CACHE_SIZE})')
+    parser.add_argument('--cache-list', action='store_true', help='list the cached snapshots and exit')
+    parser.add_argument('--cache-prune', type=float, metavar='DAYS',
+                        help='remove snapshots not used for DAYS days (0: all) and exit')
+    parser.add_argument('--workers', type=int, default=PIPELINE_WORKERS,
+                        help=f'devices of a lab configured at the same time, each stage is further limited to '
+                             f"{max(STAGE_CONCURRENCY.values())} (default: {PIPELINE_WORKERS})")
+    parser.add_argument('--no-stagger', action='store_true',
+                        help='start all nodes at once instead of in waves sized to the host load')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help='deploy every topology file (or directory of *.txt files) concurrently')
+    parser.add_argument('--batch-jobs', type=int, help='labs deployed at the same time (default: all)')
+    parser.add_argument('--batch-workers', type=int,
+                        help=f'configuration pushes running at the same time across all labs (default: {BATCH_WORKERS}); '
+                             'with --simulate, the shared budget available to the simulated lab (default: none)')
+    parser.add_argument('--simulate', action='store_true',
+                        help='predict the deploy time of the topology on a virtual clock instead of deploying')
+    parser.add_argument('--sim-workers', type=bench_list(convert=int), default=list(SIM_WORKERS), metavar='LIST',
+                        help=f"configuration worker counts to compare (default: {','.join(map(str, SIM_WORKERS))})")
+    parser.add_argument('--sim-runs', type=int, default=SIM_RUNS,
+                        help=f'simulated deploys per setting (default: {SIM_RUNS})')
+    parser.add_argument('--sim-cpus', type=int, help='host CPUs to simulate (default: this host)')
+    parser.add_argument('--sim-latencies', metavar='FILE',
+                        help='JSON boot/command latency distributions per device group or image')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Chrome trace-event output (default: clab-<lab_name>.traces/<timestamp>.json)')
+    bench = parser.add_argument_group('benchmark', 'time and profile the offline planning stages on synthetic topologies')
+    bench.add_argument('--benchmark', action='store_true', help='run the planning benchmark instead of deploying')
+    bench.add_argument('--bench-topologies', type=bench_list(BENCH_TOPOLOGIES), default=list(BENCH_TOPOLOGIES),
+                       metavar='LIST', help=f"comma separated (default: {','.join(BENCH_TOPOLOGIES)})")
+    bench.add_argument('--bench-sizes', type=bench_list(convert=int), default=list(BENCH_SIZES), metavar='LIST',
+                       help=f"approximate link counts (default: {','.join(map(str, BENCH_SIZES))})")
+    bench.add_argument('--bench-repeat', type=int, default=BENCH_REPEAT,
+                       help=f'timing runs per case, the median is kept (default: {BENCH_REPEAT})')
+    bench.add_argument('--bench-profile', action='store_true', help='print the top cProfile entries of every stage')
+    bench.add_argument('--bench-save', metavar='FILE', help='store the results as a baseline')
+    bench.add_argument('--bench-baseline', metavar='FILE', help='compare against a stored baseline, exit 1 on regression')
+    bench.add_argument('--bench-threshold', type=float, default=BENCH_THRESHOLD,
+                       help=f'allowed slowdown/memory growth ratio (default: {BENCH_THRESHOLD})')
+    args = parser.parse_args()
+    try:
+        allocator = IPAllocator(args.p2p_supernet, args.p2p_prefix, args.lan_supernet, args.lan_prefix)
+        planner = MgmtPlanner(args.mgmt_subnet, args.mgmt_network)
+    except ValueError as e:
+        parser.error(str(e))
+    cache = None if args.no_cache else SnapshotCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.node_kinds:
+        try:
+            load_node_kinds(args.node_kinds)
+        except (OSError, ValueError, TypeError, yaml.YAMLError) as e:
+            parser.exit(1, f"Error reading node kinds: {e}\n")
+    
+    if args.cache_list or args.cache_prune is not None:
+        cache = cache or SnapshotCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        if args.cache_prune is not None:
+            pruned = cache.prune(args.cache_prune)
+            print(f"Pruned {len(pruned)} snapshots")
+        if args.cache_list:
+            print_snapshot_cache(cache)
+        return
+    
+    if args.benchmark:
+        # Containerlab gerektirmeyen planlama aşamalarını ölç
+        try:
+            baseline = load_benchmark(args.bench_baseline) if args.bench_baseline else None
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error reading baseline: {e}\n")
+        results = run_benchmark(args.bench_topologies, args.bench_sizes, max(1, args.bench_repeat), args.bench_profile)
+        if args.bench_save:
+            save_benchmark(args.bench_save, results)
+            print(f"Benchmark results saved: {args.bench_save}")
+        if baseline is not None:
+            compared, regressions = compare_benchmark(results, baseline, args.bench_threshold)
+            print(f"\n{compared} cases compared against {args.bench_baseline}, {len(regressions)} regressions")
+            for regression in regressions:
+                print(f"  {regression}")
+            if regressions:
+                parser.exit(1)
+        return
+    
+    if args.batch:
+        # Her lab kendi thread'inde; tek trace dosyasında her lab ayrı süreç olarak görünür
+        run_batch(args.batch, args, parser, cache)
+        trace_file = args.trace or f"batch.traces/{trace_stamp()}.json"
+        TRACER.write(trace_file)
+        print(f"Trace written: {trace_file}")
+        return
     
-    # Lab'ı deploy et ve inventory'yi zenginleştir
-    # Eğer lab zaten varsa, reconfigure=True ile çağırın
-    deploy_lab(output_filename, lab_name, connections, reconfigure=False)
+    # Input dosyasını parse et
+    try:
+        with TRACER.span('parse'):
+            lab_name, connections = parse_input_file(args.input)
+            topology = build_topology(lab_name, connections, planner, previous_mgmt(lab_name, args.diff, args.resume))
+    except (OSError, TopologyError) as e:
+        parser.exit(1, f"Error reading topology: {e}\n")
+    except ValueError as e:
+        parser.exit(1, f"Error planning management addresses: {e}\n")
+    lab_name = topology.name
+    
+    if args.simulate:
+        # Containerlab ve Ansible olmadan deploy süresini tahmin et
+        try:
+            latencies = load_sim_latencies(args.sim_latencies) if args.sim_latencies else None
+        except (OSError, ValueError, TypeError) as e:
+            parser.exit(1, f"Error reading latencies: {e}\n")
+        try:
+            run_simulation(topology, allocator, args.sim_workers, max(1, args.sim_runs), args.sim_cpus,
+                           args.transport, args.day0, latencies, args.batch_workers)
+        except ValueError as e:
+            parser.exit(1, f"Error planning addresses: {e}\n")
+        return
+    
+    if args.fake_lab:
+        # Containerlab olmadan yerel sahte cihazlarla native backend'i dene
+        try:
+            with TRACER.span('plan'):
+                device_configs, links = create_network_vars(topology, allocator)
+        except ValueError as e:
+            parser.exit(1, f"Error planning addresses: {e}\n")
+        targets = get_probe_targets(topology)
+        attach_config_lines(targets, device_configs)
+        startup_configs = None
+        if args.day0:
+            # Sahte cihazlar oluşturulan startup config ile açılır
+            startup_configs = {target['device']: render_startup_config(topology.nodes[target['device']],
+                                                                       target['config_lines'])
+                               for target in targets}
+            for target in targets:
+                target['stages'] = DAY0_STAGES
+        with TRACER.span('pipeline', devices=len(targets)):
+            run_fake_lab(targets, links, startup_configs)
+    else:
+        # Ansible config dosyasını topolojiye göre seçilen profille oluştur
+        create_ansible_cfg(resolve_ansible_profile(topology.nodes.values()))
+        # Output dosya adını lab isminden oluştur
+        output_filename = f"{lab_name}.yaml"
+        # YAML yapısını oluştur ve yaz
+        with TRACER.span('yaml'):
+            yaml_dict = create_yaml_structure(topology, day0=args.day0)
+            snapshot = None if args.resume else find_snapshot(cache, yaml_dict, allocator, lab_name, args.diff)
+            if snapshot is not None and not args.day0:
+                # IOL node'ları da startup-config dosyasını yüklemeli
+                yaml_dict = create_yaml_structure(topology, day0=True)
+            # Node'ları host yüküne göre dalgalar halinde başlat
+            boot_workers = None if args.no_stagger else admit_boot(topology, yaml_dict)
+            written = write_yaml_file(yaml_dict, output_filename)
+        if written:
+            print(f"YAML file successfully created: {output_filename}")
+        else:
+            print(f"YAML file unchanged: {output_filename}")
+        
+        # Lab'ı deploy et ve inventory'yi zenginleştir
+        # Eğer lab zaten varsa, reconfigure=True ile çağırın
+        with TRACER.span('deploy'):
+            deploy_lab(output_filename, topology, yaml_dict, reconfigure=False, transport=args.transport,
+                       allocator=allocator, incremental=args.diff, boot_workers=boot_workers, day0=args.day0,
+                       cache=cache, snapshot=snapshot, resume=args.resume, workers=args.workers)
+        write_manifest(lab_name)
+    
+    # Süre dağılımını yaz ve kritik yolu göster
+    trace_file = args.trace or trace_path(lab_name)
+    TRACER.write(trace_file)
+    TRACER.print_summary()
+    print(f"Trace written: {trace_file}")
 
 if __name__ == "__main__":
     main()
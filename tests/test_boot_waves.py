@@ -0,0 +1,36 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+# Betik adında tire olduğundan dosya yolundan modül olarak yüklenir
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / 'ip-clab-config.py'
+spec = importlib.util.spec_from_file_location('ip_clab_config', SCRIPT)
+clab = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clab)
+
+
+def mixed_lab():
+    # 30 IOL router'ı halka, her birine bir VIOS router
+    links = []
+    for i in range(1, 31):
+        links.append(clab.TopologyLink(len(links) + 2, f'r{i}', '1', f'vr{i}', '1'))
+        links.append(clab.TopologyLink(len(links) + 2, f'r{i}', '2', f'r{i % 30 + 1}', '3'))
+    return clab.build_topology('waves', links)
+
+
+def staged_nodes(monkeypatch, cpus):
+    monkeypatch.setattr(clab, 'read_host_load', lambda: {'cpus': cpus, 'load': 0.0, 'memory': 10 ** 6})
+    topology = mixed_lab()
+    yaml_dict = clab.create_yaml_structure(topology)
+    clab.admit_boot(topology, yaml_dict)
+    return [name for name, node in yaml_dict['topology']['nodes'].items() if 'stages' in node]
+
+
+def test_waves_dropped_when_all_at_once_is_predicted_faster(monkeypatch):
+    assert staged_nodes(monkeypatch, 32) == []
+
+
+@pytest.mark.parametrize('cpus', [4, 16])
+def test_waves_kept_when_all_at_once_misses_deadlines(monkeypatch, cpus):
+    assert staged_nodes(monkeypatch, cpus)
@@ -0,0 +1,143 @@
+import asyncio
+import importlib.util
+import pathlib
+
+import pytest
+
+# Betik adında tire olduğundan dosya yolundan modül olarak yüklenir
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / 'ip-clab-config.py'
+spec = importlib.util.spec_from_file_location('ip_clab_config', SCRIPT)
+clab = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clab)
+
+CONFIG_LINES = [
+    'interface Ethernet0/1',
+    'ip address 10.0.0.1 255.255.255.252',
+    'no shutdown',
+]
+
+
+def run_with_device(check, **device_options):
+    # Yerel sahte cihazı başlat, check(device, target) coroutine'ini çalıştır ve cihazı kapat
+    async def main():
+        device = clab.FakeIOSDevice('r1', **device_options)
+        target = {'device': 'r1', 'host': '127.0.0.1', 'port': await device.start(), 'protocol': 'tcp',
+                  'config_lines': list(CONFIG_LINES)}
+        try:
+            return await check(device, target)
+        finally:
+            await device.stop()
+    return asyncio.run(main())
+
+
+async def open_session(target):
+    return await clab.open_cli_session(target, clab.PROBE_TIMEOUT)
+
+
+def test_login_and_enable_learn_prompt():
+    async def check(device, target):
+        session = await open_session(target)
+        try:
+            prompts = [session.prompt]
+            await session.enable(clab.DEVICE_PASSWORD)
+            prompts.append(session.prompt)
+            await session.command('configure terminal')
+            prompts.append(session.prompt)
+            await session.command('interface Ethernet0/1')
+            prompts.append(session.prompt)
+            await session.command('end')
+            prompts.append(session.prompt)
+            return prompts
+        finally:
+            session.close()
+
+    assert run_with_device(check) == ['r1>', 'r1#', 'r1(config)#', 'r1(config-if)#', 'r1#']
+
+
+def test_wrong_enable_password_raises_prompt_error():
+    async def check(device, target):
+        session = await open_session(target)
+        try:
+            await session.enable('wrong')
+        finally:
+            session.close()
+
+    with pytest.raises(clab.PromptError) as error:
+        run_with_device(check)
+    assert clab.error_class(error.value) == 'prompt'
+
+
+@pytest.mark.parametrize('confirm_save', [False, True])
+def test_save_answers_destination_and_confirm(confirm_save):
+    async def check(device, target):
+        session = await open_session(target)
+        try:
+            await session.enable(clab.DEVICE_PASSWORD)
+            await session.configure(CONFIG_LINES)
+            output = await session.save()
+            # Kaydetmeden sonra oturum prompt'ta kalmalı
+            await session.command('terminal length 0')
+            return output, device.startup
+        finally:
+            session.close()
+
+    output, startup = run_with_device(check, confirm_save=confirm_save)
+    assert 'Destination filename' in output
+    assert ('[confirm]' in output) == confirm_save
+    assert '[OK]' in output
+    assert startup == {'Ethernet0/1': ['ip address 10.0.0.1 255.255.255.252', 'no shutdown']}
+
+
+def test_native_transport_push_verify_save():
+    async def check(device, target):
+        transport = clab.NativeTransport()
+        await transport.push(target)
+        await transport.verify(target)
+        first = await transport.save([target])
+        # Running ve startup aynıysa tekrar yazılmaz
+        second = await transport.save([target])
+        return first, second
+
+    first, second = run_with_device(check)
+    assert first == {'r1': ('saved', None)}
+    assert second == {'r1': ('unchanged', None)}
+
+
+def test_verify_reports_missing_configuration():
+    async def check(device, target):
+        await clab.NativeTransport().verify(target)
+
+    with pytest.raises(clab.ConfigMismatch, match='interface Ethernet0/1'):
+        run_with_device(check)
+
+
+def test_invalid_command_raises_command_rejected():
+    async def check(device, target):
+        await clab.NativeTransport().push(dict(target, config_lines=['interface Ethernet0/1', 'switchport mode trunk']))
+
+    with pytest.raises(clab.CommandRejected, match='switchport mode trunk: % Invalid input') as error:
+        run_with_device(check)
+    assert clab.error_class(error.value) == 'rejected'
+    assert clab.retry_delay(error.value, 1) is None
+
+
+def test_login_failure_raises_authentication_error():
+    async def check(device, target):
+        await open_session(target)
+
+    with pytest.raises(clab.AuthenticationError) as error:
+        run_with_device(check, password='not-the-lab-password')
+    assert clab.error_class(error.value) == 'auth'
+    assert clab.retry_delay(error.value, 1) is None
+
+
+def test_closed_connection_raises_cli_timeout():
+    async def check(device, target):
+        session = await open_session(target)
+        try:
+            await session.command('exit')
+        finally:
+            session.close()
+
+    with pytest.raises(clab.CLITimeout, match='connection closed'):
+        run_with_device(check)
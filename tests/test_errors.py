@@ -0,0 +1,31 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+# Betik adında tire olduğundan dosya yolundan modül olarak yüklenir
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / 'ip-clab-config.py'
+spec = importlib.util.spec_from_file_location('ip_clab_config', SCRIPT)
+clab = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clab)
+
+
+@pytest.mark.parametrize('message, unreachable, expected', [
+    # Yavaş açılan VIOS'un SSH sunucusu kimlik doğrulamayı süresinde bitiremez: beklenir
+    ('Authentication timeout.', True, 'timeout'),
+    ('Authentication failed.', True, 'auth'),
+    ('Failed to connect to the host via ssh: Permission denied (password).', True, 'auth'),
+    ('% Login invalid', False, 'auth'),
+    ("% Invalid input detected at '^' marker.", False, 'rejected'),
+    ('unable to elevate privilege to enable mode', False, 'prompt'),
+    ('ssh connection failed: [Errno 111] Connection refused', True, 'timeout'),
+    ('unexpected module failure', True, 'timeout'),
+    ('unexpected module failure', False, 'error'),
+])
+def test_ansible_error_classes(message, unreachable, expected):
+    assert clab.error_class(clab.ansible_error(message, unreachable)) == expected
+
+
+def test_authentication_timeout_is_retried():
+    error = clab.ansible_error('Authentication timeout.', unreachable=True)
+    assert clab.retry_delay(error, 1) is not None
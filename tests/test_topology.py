@@ -0,0 +1,42 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+# Betik adında tire olduğundan dosya yolundan modül olarak yüklenir
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / 'ip-clab-config.py'
+spec = importlib.util.spec_from_file_location('ip_clab_config', SCRIPT)
+clab = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clab)
+
+INPUT = """name: lines
+
+# router - switch
+r1 e0/2 r2 e0/2
+r5 e0/1 r7 e0/1
+"""
+
+
+def write_input(tmp_path, text):
+    path = tmp_path / 'input.txt'
+    path.write_text(text)
+    return str(path)
+
+
+def test_links_record_their_source_line(tmp_path):
+    lab_name, links = clab.parse_input_file(write_input(tmp_path, INPUT))
+    assert lab_name == 'lines'
+    assert [link.line for link in links] == [4, 5]
+
+
+def test_duplicate_endpoint_reports_source_lines(tmp_path):
+    text = "name: lines\n\n# iki bağlantı aynı uçta\nr1 e0/1 r2 e0/1\nr1 e0/1 r3 e0/1\n"
+    topology = clab.build_topology(*clab.parse_input_file(write_input(tmp_path, text)))
+    with pytest.raises(ValueError, match='line 5: r1 0/1 is already used by the link on line 4'):
+        clab.plan_network(topology, clab.IPAllocator())
+
+
+def test_device_number_outside_loopback_pools_is_rejected(tmp_path):
+    with pytest.raises(clab.TopologyError) as error:
+        clab.parse_input_file(write_input(tmp_path, "name: lines\nr1 e0/1 r300 e0/1\n"))
+    assert error.value.errors == [(2, 'device number 300 of r300 does not fit its loopback pools (at most 255)')]